@@ -0,0 +1,82 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Knot vector compression : the original set() / count() getFCKnots
+# against geometry.compress_knots. Correctness on dense and near duplicate
+# knot vectors is checked in tests/test_geometry.py
+#
+#   FreeCADCmd benchmarks/bench_knots.py [knot counts ...]
+
+import os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freecad.importNURBS.geometry import compress_knots
+
+
+def legacy_knots(k):
+    # getFCKnots before compress_knots, without the end multiplicities
+    k = list(k)
+    mults = []
+    knots = list(set(k))
+    knots.sort()
+    for kn in knots:
+        mults.append(k.count(kn))
+    return knots, mults
+
+
+def dense_knots(n, degree=3):
+    # clamped vector, n interior knots some of them repeated
+    knots = [0.0] * degree
+    value = 0.0
+    while len(knots) < n + degree:
+        value += 1.0
+        knots.extend([value] * random.choice((1, 1, 1, 2, 3)))
+    knots.extend([value + 1.0] * degree)
+    return knots
+
+
+def timeit(func, k, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(k)
+        t = time.perf_counter() - start
+        best = t if best is None else min(best, t)
+    return best
+
+
+def main(sizes):
+    random.seed(2)
+    print(f"{'knots':>8} {'legacy ms':>11} {'compress ms':>12} {'speedup':>8}")
+    for n in sizes:
+        k = dense_knots(n)
+        tl = timeit(legacy_knots, k)
+        tc = timeit(compress_knots, k)
+        print(f"{len(k):>8} {1000 * tl:>11.2f} {1000 * tc:>12.2f} {tl / tc:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100, 1000, 10000, 50000])
@@ -0,0 +1,104 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Mesh import throughput : faces per second, original per facet loop
+# against the batched NumPy path used by File3dm.create_mesh
+#
+#   FreeCADCmd benchmarks/bench_mesh.py [quads per side ...]
+
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rhino3dm as r3
+
+from freecad.importNURBS.geometry import mesh_triangles
+import Mesh
+
+
+def make_grid_mesh(n):
+    # n x n quads, every other row split into triangles
+    mesh = r3.Mesh()
+    for j in range(n + 1):
+        for i in range(n + 1):
+            mesh.Vertices.Add(float(i), float(j), 0.0)
+    for j in range(n):
+        for i in range(n):
+            a = j * (n + 1) + i
+            b, c, d = a + 1, a + n + 2, a + n + 1
+            if j % 2:
+                mesh.Faces.AddFace(a, b, c)
+                mesh.Faces.AddFace(a, c, d)
+            else:
+                mesh.Faces.AddFace(a, b, c, d)
+    return mesh
+
+
+def legacy_loop(r3mesh):
+    # The per facet loop File3dm.create_mesh used to run
+    fcMesh = Mesh.Mesh()
+    r3mesh.Faces.ConvertQuadsToTriangles()
+    for m in range(r3mesh.Faces.TriangleCount):
+        mf = r3mesh.Faces[m]
+        fval = ()
+        for r in range(0, 3):
+            f = mf[r]
+            fval = fval + (
+                float(r3mesh.Vertices[f].X),
+                float(r3mesh.Vertices[f].Y),
+                float(r3mesh.Vertices[f].Z),
+            )
+        fcMesh.addFacet(*fval)
+    return r3mesh.Faces.TriangleCount
+
+
+def batched(r3mesh):
+    points, facets = mesh_triangles(r3mesh)
+    fcMesh = Mesh.Mesh()
+    fcMesh.addFacets(
+        (list(map(tuple, points.tolist())), list(map(tuple, facets.tolist())))
+    )
+    return len(facets)
+
+
+def timeit(func, mesh):
+    start = time.perf_counter()
+    faces = func(mesh)
+    return faces, time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'faces':>10} {'legacy f/s':>14} {'batched f/s':>14} {'speedup':>8}")
+    for n in sizes:
+        faces, tb = timeit(batched, make_grid_mesh(n))
+        # legacy loop converts the quads in place so give it its own copy
+        lfaces, tl = timeit(legacy_loop, make_grid_mesh(n))
+        print(
+            f"{faces:>10} {lfaces / tl:>14.0f} {faces / tb:>14.0f} {tl / tb:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [50, 200, 500])
@@ -0,0 +1,104 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Parallel extraction : import a generated file of NurbsSurfaces and
+# meshes serially, then with geometry extracted into ir records by a
+# process pool, and check both give the same objects
+#
+#   FreeCADCmd benchmarks/bench_parallel.py [object count] [workers]
+
+import os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import FreeCAD
+import rhino3dm as r3
+
+from freecad.importNURBS.core import File3dm
+
+
+def make_surface(x, y, n=12):
+    nu = r3.NurbsSurface.Create(3, False, 4, 4, n, n)
+    for i in range(n):
+        for j in range(n):
+            nu.Points[i, j] = r3.Point4d(x + i, y + j, (i * j) % 3, 1.0)
+    for k in range(len(nu.KnotsU)):
+        nu.KnotsU[k] = float(max(0, min(k - 2, n - 3)))
+    for k in range(len(nu.KnotsV)):
+        nu.KnotsV[k] = float(max(0, min(k - 2, n - 3)))
+    return nu
+
+
+def make_mesh(x, y, n=20):
+    mesh = r3.Mesh()
+    for i in range(n + 1):
+        for j in range(n + 1):
+            mesh.Vertices.Add(x + i * 0.1, y + j * 0.1, 0.0)
+    for i in range(n):
+        for j in range(n):
+            a = i * (n + 1) + j
+            mesh.Faces.AddFace(a, a + n + 1, a + n + 2, a + 1)
+    return mesh
+
+
+def make_file(path, count):
+    f3dm = r3.File3dm()
+    for i in range(count):
+        x = float(i % 50) * 20.0
+        y = float(i // 50) * 20.0
+        if i % 2:
+            f3dm.Objects.AddMesh(make_mesh(x, y))
+        else:
+            f3dm.Objects.AddSurface(make_surface(x, y))
+    f3dm.Write(path, 7)
+
+
+def timed_import(path, workers):
+    doc = FreeCAD.newDocument("bench")
+    try:
+        start = time.perf_counter()
+        objs = File3dm(path).parse_objects(doc, True, workers)
+        return [o.TypeId for o in objs], time.perf_counter() - start
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+
+def main(count, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"objects_{count}.3dm")
+        make_file(path, count)
+        serial_types, serial = timed_import(path, 1)
+        parallel_types, parallel = timed_import(path, workers)
+    assert serial_types == parallel_types, "parallel import differs"
+    print(f"{len(serial_types)} objects")
+    print(f"  serial              : {serial:8.2f}s")
+    print(f"  {workers:2d} workers          : {parallel:8.2f}s  {serial / parallel:.1f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 2,
+    )
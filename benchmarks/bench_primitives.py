@@ -0,0 +1,81 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Analytic primitives : tessellate and boolean exact Part surfaces against
+# the same surfaces converted to BSplines, as they were imported before
+# primitive recognition
+#
+#   FreeCADCmd benchmarks/bench_primitives.py [repeats]
+
+import sys, time
+
+import FreeCAD
+import Part
+
+V = FreeCAD.Vector
+
+
+def solids():
+    "Exact solids, keyed by the primitive their curved face is"
+    return {
+        "Plane": Part.makeBox(10, 10, 10),
+        "Cylinder": Part.makeCylinder(5, 10),
+        "Cone": Part.makeCone(5, 2, 10),
+        "Sphere": Part.makeSphere(5),
+    }
+
+
+def timed(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def tessellate(shape):
+    # tessellation is cached on the shape, so work on a fresh copy
+    return lambda: shape.copy().tessellate(0.01)
+
+
+def boolean(shape, tool):
+    return lambda: shape.cut(tool).fuse(tool)
+
+
+def main(repeats):
+    tool = Part.makeBox(4, 4, 20, V(2, 2, -5))
+    print(f"{'':10s}{'tessellate':>24s}{'boolean':>24s}")
+    for name, exact in solids().items():
+        nurbs = exact.toNurbs()
+        assert abs(nurbs.Volume - exact.Volume) < 1e-3 * exact.Volume
+        row = []
+        for make in (tessellate, lambda s: boolean(s, tool)):
+            a = timed(make(exact), repeats)
+            b = timed(make(nurbs), repeats)
+            row.append(f"{a * 1000:7.1f} / {b * 1000:7.1f}ms {b / a:4.1f}x")
+        print(f"{name:10s}" + "".join(f"{r:>24s}" for r in row))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,83 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Deferred recompute : import a generated file of N parametric objects
+# ( lines, polylines, arcs ) with a recompute per object, then with one
+# transaction and a single document recompute
+#
+#   FreeCADCmd benchmarks/bench_recompute.py [object count]
+
+import os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import FreeCAD
+import rhino3dm as r3
+
+from freecad.importNURBS.core import File3dm
+
+
+def make_file(path, count):
+    f3dm = r3.File3dm()
+    for i in range(count):
+        x = float(i % 100) * 3.0
+        y = float(i // 100) * 3.0
+        kind = i % 3
+        if kind == 0:
+            f3dm.Objects.AddLine(r3.Point3d(x, y, 0), r3.Point3d(x + 1, y + 1, 0))
+        elif kind == 1:
+            pts = [r3.Point3d(x + j * 0.5, y + (j % 2), 0) for j in range(5)]
+            f3dm.Objects.AddPolyline(pts)
+        else:
+            f3dm.Objects.AddArc(r3.Arc(r3.Point3d(x, y, 0), 1.0, 2.0))
+    f3dm.Write(path, 7)
+
+
+def timed_import(path, deferred):
+    doc = FreeCAD.newDocument("bench")
+    try:
+        start = time.perf_counter()
+        fi = File3dm(path)
+        objs = fi.parse_objects(doc, deferred)
+        if not deferred:
+            doc.recompute()
+        return len(objs), time.perf_counter() - start
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+
+def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"objects_{count}.3dm")
+        make_file(path, count)
+        n, immediate = timed_import(path, False)
+        n, deferred = timed_import(path, True)
+    print(f"{n} objects")
+    print(f"  recompute per object : {immediate:8.2f}s")
+    print(f"  deferred recompute   : {deferred:8.2f}s  {immediate / deferred:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,126 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# SubD subdivision : checks the array Catmull-Clark against a plain per
+# vertex implementation on small nets with creases, corners, a triangle and
+# a pentagon, then times levels on a wavy grid of control faces
+#
+#   python benchmarks/bench_subd.py [control faces per side] [max level]
+
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from freecad.importNURBS.subd import ControlNet, subd_mesh, subdivide
+
+
+def reference(points, faces, creases=(), corners=()):
+    "Catmull-Clark points the textbook way : vertex, edge and face points"
+    P = [np.array(p, dtype=float) for p in points]
+    fp = [sum(P[v] for v in f) / len(f) for f in faces]
+    edges = {}
+    for fi, f in enumerate(faces):
+        for k in range(len(f)):
+            edges.setdefault(frozenset((f[k], f[(k + 1) % len(f)])), []).append(fi)
+    creaseSet = {frozenset(c) for c in creases}
+    sharp = {e: len(fs) != 2 or e in creaseSet for e, fs in edges.items()}
+    ep = {}
+    for e, fs in edges.items():
+        a, b = tuple(e)
+        if sharp[e]:
+            ep[e] = (P[a] + P[b]) / 2
+        else:
+            ep[e] = (P[a] + P[b] + fp[fs[0]] + fp[fs[1]]) / 4
+    vp = []
+    for v in range(len(P)):
+        incident = [e for e in edges if v in e]
+        sharpEdges = [e for e in incident if sharp[e]]
+        n = len(incident)
+        if v in corners or len(sharpEdges) > 2 or n == 0:
+            vp.append(P[v])
+        elif len(sharpEdges) == 2:
+            others = [P[(set(e) - {v}).pop()] for e in sharpEdges]
+            vp.append((6 * P[v] + others[0] + others[1]) / 8)
+        else:
+            vf = [fp[fi] for fi, f in enumerate(faces) if v in f]
+            F = sum(vf) / len(vf)
+            R = sum((P[a] + P[b]) / 2 for a, b in map(tuple, incident)) / n
+            vp.append((F + 2 * R + (n - 3) * P[v]) / n)
+    return vp, ep, fp
+
+
+def make_net(points, faces, creases=(), corners=()):
+    offsets = np.cumsum([0] + [len(f) for f in faces])
+    return ControlNet(points, [v for f in faces for v in f], offsets, creases, corners)
+
+
+def check(points, faces, creases=(), corners=()):
+    refined = subdivide(make_net(points, faces, creases, corners))
+    vp, ep, fp = reference(points, faces, creases, corners)
+    expected = {tuple(np.round(p, 9)) for p in vp + list(ep.values()) + fp}
+    got = {tuple(np.round(p, 9)) for p in refined.points}
+    assert got == expected, "subdivided points differ"
+    assert len(refined.points) == len(vp) + len(ep) + len(fp)
+
+
+def grid(n):
+    points = [
+        (i, j, np.sin(i * 0.3) * np.cos(j * 0.2)) for j in range(n + 1) for i in range(n + 1)
+    ]
+    faces = [
+        (j * (n + 1) + i, j * (n + 1) + i + 1, (j + 1) * (n + 1) + i + 1, (j + 1) * (n + 1) + i)
+        for j in range(n)
+        for i in range(n)
+    ]
+    return make_net(points, faces)
+
+
+def main(n, levels):
+    cube = [(x, y, z) for z in (0, 1) for y in (0, 1) for x in (0, 1)]
+    cubeFaces = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+    check(cube, cubeFaces)
+    check(cube, cubeFaces, creases=[(0, 1), (1, 3), (3, 2), (2, 0)], corners=[7])
+    mixed = [(0, 0, 0), (1, 0, 0), (2, 0, 0), (0, 1, 0), (1, 1, 0.5), (2, 1, 0),
+             (0, 2, 0), (1, 2, 0), (2, 2, 0.3), (3, 1, 0), (3, 2, 0), (2.5, 2.5, 0)]
+    check(mixed, [(0, 1, 4, 3), (1, 2, 5, 4), (3, 4, 7, 6), (4, 5, 8, 7), (2, 9, 5),
+                  (5, 9, 10, 11, 8)])
+    print("subdivision matches the reference")
+    net = grid(n)
+    print(f"{net.face_count} control faces")
+    for level in range(1, levels + 1):
+        start = time.perf_counter()
+        mesh = subd_mesh(net, level)
+        seconds = time.perf_counter() - start
+        print(f"  level {level}  {len(mesh.facets):9d} triangles  {seconds:7.2f}s"
+              f"  {mesh.points.nbytes + mesh.facets.nbytes >> 20:6d} MB")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+    )
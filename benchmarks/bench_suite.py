@@ -0,0 +1,352 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Synthetic large file suite : generates 3dm files of NURBS curves, large
+# CV grid surfaces, a million face mesh, a dense point cloud and a many
+# face Brep, imports each with File3dm and reports the time spent in each
+# import stage. Runs in FreeCAD, or anywhere rhino3dm and numpy are
+# installed with the stand-in FreeCAD / Part / Mesh / Points modules in
+# benchmarks/standin, so import speed can be tracked in CI.
+#
+#   FreeCADCmd benchmarks/bench_suite.py
+#   python benchmarks/bench_suite.py --scale 0.05 --json now.json --baseline last.json
+#
+# With the stand-in the build and insert stages only measure the Python
+# side, they hand arrays to modules that keep them without building shapes.
+
+import argparse, functools, inspect, json, os, sys, tempfile, time
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+
+def use_standin(force=False):
+    "Put the stand-in modules on the path unless FreeCAD can be imported"
+    if not force:
+        try:
+            import FreeCAD  # noqa: F401
+
+            return False
+        except ImportError:
+            pass
+    sys.path.insert(0, os.path.join(HERE, "standin"))
+    for name in ("FreeCAD", "Part", "Mesh", "Points"):
+        sys.modules.pop(name, None)
+    return True
+
+
+###########################################
+#
+# Synthetic files, sizes are for scale 1
+#
+###########################################
+
+
+def make_curves(r3, f3dm, scale):
+    # NURBS curves of 20 CVs
+    for k in range(max(1, int(5000 * scale))):
+        y = float(k)
+        points = [r3.Point3d(float(i), y, float(i % 3)) for i in range(20)]
+        f3dm.Objects.AddCurve(r3.NurbsCurve.Create(False, 3, points))
+
+
+def make_surfaces(r3, f3dm, scale):
+    # 20 surfaces of 200 x 200 CVs, scale shrinks the grid
+    n = max(8, int(200 * scale ** 0.5))
+    for k in range(20):
+        nu = r3.NurbsSurface.Create(3, False, 4, 4, n, n)
+        points = nu.Points
+        for i in range(n):
+            for j in range(n):
+                points[i, j] = r3.Point4d(i, j + k * n, ((i * j) % 7) * 0.1, 1.0)
+        for knots in (nu.KnotsU, nu.KnotsV):
+            for i in range(len(knots)):
+                knots[i] = float(max(0, min(i - 2, n - 3)))
+        f3dm.Objects.AddSurface(nu)
+
+
+def grid_mesh(r3, n, z=lambda i, j: 0.0):
+    mesh = r3.Mesh()
+    for j in range(n + 1):
+        for i in range(n + 1):
+            mesh.Vertices.Add(float(i), float(j), z(i, j))
+    for j in range(n):
+        for i in range(n):
+            a = j * (n + 1) + i
+            mesh.Faces.AddFace(a, a + 1, a + n + 2, a + n + 1)
+    return mesh
+
+
+def make_mesh(r3, f3dm, scale):
+    # 1000 x 1000 quads, a million faces
+    n = max(2, int(1000 * scale ** 0.5))
+    f3dm.Objects.AddMesh(grid_mesh(r3, n, lambda i, j: ((i + j) % 5) * 0.01))
+
+
+def make_point_cloud(r3, f3dm, scale):
+    # a million points with colors
+    count = max(1, int(1000000 * scale))
+    pc = r3.PointCloud()
+    points = [r3.Point3d(i % 1000, i // 1000, (i % 17) * 0.01) for i in range(count)]
+    colors = [(i % 256, 128, 64, 255) for i in range(count)]
+    pc.AddRange(points, colors)
+    f3dm.Objects.AddPointCloud(pc)
+
+
+def make_brep(r3, f3dm, scale):
+    # a polysurface of 2500 planar faces, one per quad of a grid mesh
+    n = max(2, int(50 * scale ** 0.5))
+    f3dm.Objects.AddBrep(r3.Brep.CreateFromMesh(grid_mesh(r3, n), True))
+
+
+def make_extrusions(r3, f3dm, scale):
+    # 5000 capped box extrusions, every other one with a round hole
+    for k in range(max(1, int(5000 * scale))):
+        x, y = float(k % 100) * 12, float(k // 100) * 8
+        outline = r3.Polyline(5)
+        for px, py in ((0, 0), (10, 0), (10, 5), (0, 5), (0, 0)):
+            outline.Add(x + px, y + py, 0.0)
+        e = r3.Extrusion.Create(r3.PolylineCurve(outline), 3.0 + k % 4, True)
+        if k % 2:
+            e.AddInnerProfile(r3.Circle(r3.Point3d(x + 5, y + 2.5, 0), 1).ToNurbsCurve())
+        f3dm.Objects.AddExtrusion(e)
+
+
+CASES = {
+    "curves": make_curves,
+    "surfaces": make_surfaces,
+    "mesh": make_mesh,
+    "pointcloud": make_point_cloud,
+    "brep": make_brep,
+    "extrusions": make_extrusions,
+}
+
+
+def make_file(path, case, scale):
+    import rhino3dm as r3
+
+    f3dm = r3.File3dm()
+    CASES[case](r3, f3dm, scale)
+    f3dm.Write(path, 7)
+
+
+###########################################
+#
+# Stage timing
+#
+###########################################
+
+
+class StageTimer:
+    "Exclusive time per stage, time in a nested stage is not its caller's"
+
+    def __init__(self):
+        self.totals = Counter()
+        self.stack = []
+
+    def enter(self, stage):
+        now = time.perf_counter()
+        if self.stack:
+            self.totals[self.stack[-1][0]] += now - self.stack[-1][1]
+        self.stack.append([stage, now])
+
+    def leave(self):
+        now = time.perf_counter()
+        stage, start = self.stack.pop()
+        self.totals[stage] += now - start
+        if self.stack:
+            self.stack[-1][1] = now
+
+    def wrap(self, owner, attr, stage):
+        func = getattr(owner, attr)
+        timer = self
+        if inspect.isgeneratorfunction(func):
+            # time each step of a generator, not just creating it
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                gen = func(*args, **kwargs)
+                while True:
+                    timer.enter(stage)
+                    try:
+                        item = next(gen)
+                    except StopIteration:
+                        return
+                    finally:
+                        timer.leave()
+                    yield item
+
+        else:
+
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                timer.enter(stage)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    timer.leave()
+
+        setattr(owner, attr, timed)
+
+
+# ( stage, module, names ) instrumented, File3dm methods are named "File3dm.x"
+STAGES = (
+    ("read", "core", ["File3dm.__init__"]),
+    ("dispatch", "core", [
+        "File3dm.iter_serial", "File3dm.import_object", "File3dm.import_geometry",
+    ]),
+    ("extract", "core", [
+        "curve_ir", "surface_ir", "mesh_ir", "brep_ir", "extrusion_ir", "wire_ir",
+    ]),
+    ("extract", "ir", [
+        "curve_ir", "surface_ir", "face_ir", "edges_ir", "render_mesh_ir",
+        "segments_ir",
+    ]),
+    ("knots", "ir", ["fc_knots"]),
+    ("knots", "core", ["fc_knots"]),
+    ("poles", "ir", [
+        "curve_control_points", "surface_control_net", "dehomogenize", "mesh_triangles",
+    ]),
+    ("poles", "core", ["point_cloud_chunks"]),
+    ("recognize", "ir", ["recognize_curve", "recognize_surface"]),
+    ("fingerprint", "core", ["fingerprint", "curve_key"]),
+    ("build", "core", [
+        "setCloudPoints",
+        "File3dm.build_curve",
+        "File3dm.curve_shape",
+        "File3dm.wire_shape",
+        "File3dm.bspline_surface",
+        "File3dm.build_surface",
+        "File3dm.surface_shape",
+        "File3dm.build_brep",
+        "File3dm.build_face",
+        "File3dm.build_extrusion",
+        "File3dm.build_mesh",
+    ]),
+    ("insert", "core", [
+        "File3dm.convert_objects", "File3dm.to_objects", "tagObject",
+    ]),
+)
+
+
+def instrument(timer):
+    from freecad.importNURBS import core, ir
+
+    modules = {"core": core, "ir": ir}
+    for stage, module, names in STAGES:
+        for name in names:
+            owner = modules[module]
+            if "." in name:
+                cls, name = name.split(".")
+                owner = getattr(owner, cls)
+            timer.wrap(owner, name, stage)
+
+
+def timed_import(path, timer):
+    import FreeCAD
+    from freecad.importNURBS.core import File3dm
+
+    doc = FreeCAD.newDocument("bench")
+    timer.totals.clear()
+    # whatever no stage claims, e.g. the document recompute
+    timer.enter("other")
+    start = time.perf_counter()
+    try:
+        objs = File3dm(path).parse_objects(doc, True)
+    finally:
+        total = time.perf_counter() - start
+        timer.leave()
+        FreeCAD.closeDocument(doc.Name)
+    return len(objs), total, dict(timer.totals)
+
+
+def compare(results, baseline, slower, floor=0.05):
+    "Stages of any case slower than slower times the baseline, ignoring tiny ones"
+    regressions = []
+    for case, now in results["cases"].items():
+        before = baseline.get("cases", {}).get(case)
+        if before is None:
+            continue
+        pairs = [("total", now["total"], before["total"])]
+        pairs += [
+            (stage, t, before["stages"].get(stage, 0.0))
+            for stage, t in now["stages"].items()
+        ]
+        for stage, t, b in pairs:
+            if t > floor and t > slower * b:
+                regressions.append(f"{case} {stage} {b:.3f}s -> {t:.3f}s")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=1.0, help="size of the files")
+    parser.add_argument("--case", action="append", choices=sorted(CASES))
+    parser.add_argument("--standin", action="store_true", help="never use FreeCAD")
+    parser.add_argument("--dir", help="keep generated files here and reuse them")
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--baseline", help="results to compare against")
+    parser.add_argument("--slower", type=float, default=1.5,
+                        help="fail when a stage takes this many times the baseline")
+    args = parser.parse_args(argv)
+
+    standin = use_standin(args.standin)
+    timer = StageTimer()
+    instrument(timer)
+    import FreeCAD
+
+    results = {
+        "freecad": "standin" if standin else ".".join(FreeCAD.Version()[:3]),
+        "scale": args.scale,
+        "cases": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.dir or tmp
+        os.makedirs(folder, exist_ok=True)
+        for case in args.case or list(CASES):
+            path = os.path.join(folder, f"{case}_{args.scale:g}.3dm")
+            if not os.path.exists(path):
+                make_file(path, case, args.scale)
+            count, total, stages = timed_import(path, timer)
+            results["cases"][case] = {"objects": count, "total": total, "stages": stages}
+            slowest = sorted(stages.items(), key=lambda st: -st[1])
+            print(
+                f"{case:12s}{count:6d} objects {total:8.3f}s  "
+                + "  ".join(f"{s} {t:.3f}" for s, t in slowest if t >= 0.0005)
+            )
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump(results, fp, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fp:
+            regressions = compare(results, json.load(fp), args.slower)
+        for r in regressions:
+            print("slower :", r)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
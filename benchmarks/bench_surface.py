@@ -0,0 +1,95 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# NurbsSurface pole extraction : the original per control point loop
+# ( FreeCAD.Vector per point, three divisions by W ) against the bulk
+# control net read and vectorized dehomogenize in create_nurbs_surface
+#
+#   FreeCADCmd benchmarks/bench_surface.py [CVs per side ...]
+
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import FreeCAD
+import rhino3dm as r3
+
+from freecad.importNURBS.geometry import dehomogenize, surface_control_net, to_tuples
+
+
+def make_surface(n, rational=True, degree=3):
+    nu = r3.NurbsSurface.Create(3, rational, degree + 1, degree + 1, n, n)
+    for d, knots in ((0, nu.KnotsU), (1, nu.KnotsV)):
+        count = len(knots)
+        for i in range(count):
+            knots[i] = float(min(max(i - degree + 1, 0), count - 2 * degree + 1))
+    for u in range(n):
+        for v in range(n):
+            w = 1.0 + 0.5 * ((u + v) % 2) if rational else 1.0
+            nu.Points[u, v] = r3.Point4d(u * w, v * w, ((u * v) % 7) * w, w)
+    return nu
+
+
+def legacy_poles(nu):
+    pts = []
+    weights = []
+    for u in range(nu.Points.CountU):
+        row = []
+        wrow = []
+        for v in range(nu.Points.CountV):
+            p = nu.Points[u, v]
+            row.append(FreeCAD.Vector(p.X / p.W, p.Y / p.W, p.Z / p.W))
+            wrow.append(p.W)
+        pts.append(row)
+        weights.append(wrow)
+    return pts, weights
+
+
+def bulk_poles(nu):
+    poles, weights = dehomogenize(surface_control_net(nu), nu.IsRational)
+    return to_tuples(poles), None if weights is None else weights.tolist()
+
+
+def timeit(func, nu):
+    start = time.perf_counter()
+    func(nu)
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'CVs':>10} {'rational':>9} {'legacy ms':>11} {'bulk ms':>9} {'speedup':>8}")
+    for n in sizes:
+        for rational in (False, True):
+            nu = make_surface(n, rational)
+            tl = timeit(legacy_poles, nu)
+            tb = timeit(bulk_poles, nu)
+            print(
+                f"{n * n:>10} {str(rational):>9} {1000 * tl:>11.2f}"
+                f" {1000 * tb:>9.2f} {tl / tb:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 100, 300, 600])
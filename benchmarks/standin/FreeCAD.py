@@ -0,0 +1,247 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Stand-in for FreeCAD's App module, enough of it for the importer core to
+# run where FreeCAD is not installed ( see benchmarks/bench_suite.py ).
+# Documents and objects only hold what is assigned to them, the Part, Mesh
+# and Points stand-ins check their input the way the real ones would.
+
+import math
+
+GuiUp = False
+
+
+def addImportType(*args):
+    pass
+
+
+def Version():
+    return ["1", "0", "0", "38495 (Git)"]
+
+
+class Vector:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        if isinstance(x, (tuple, list, Vector)):
+            x, y, z = x
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __add__(self, o):
+        return Vector(self.x + o.x, self.y + o.y, self.z + o.z)
+
+    def __sub__(self, o):
+        return Vector(self.x - o.x, self.y - o.y, self.z - o.z)
+
+    def __mul__(self, f):
+        return Vector(self.x * f, self.y * f, self.z * f)
+
+    @property
+    def Length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normalize(self):
+        length = self.Length or 1.0
+        return Vector(self.x / length, self.y / length, self.z / length)
+
+    def distanceToPoint(self, o):
+        return (self - o).Length
+
+    def __repr__(self):
+        return f"Vector ({self.x}, {self.y}, {self.z})"
+
+
+class Matrix:
+    def __init__(self, *args):
+        self.A = args
+
+
+class Rotation:
+    def __init__(self, *args):
+        self.args = args
+
+
+class Placement:
+    def __init__(self, *args):
+        self.Base = args[0] if args and isinstance(args[0], Vector) else Vector()
+        self.Rotation = Rotation()
+        self.Matrix = args[0] if args and isinstance(args[0], Matrix) else Matrix()
+
+
+class _Console:
+    def PrintMessage(self, text):
+        print(text, end="")
+
+    PrintLog = PrintWarning = PrintError = PrintMessage
+
+
+Console = _Console()
+
+
+class _Parameters:
+    # shared by every path, settings made by a benchmark apply everywhere
+    values = {}
+
+    def _get(self, name, default=None):
+        return self.values.get(name, default)
+
+    def _set(self, name, value):
+        self.values[name] = value
+
+    GetBool = GetInt = GetFloat = GetString = _get
+    SetBool = SetInt = SetFloat = SetString = _set
+
+
+def ParamGet(path):
+    return _Parameters()
+
+
+# Values the typed properties accept, App::PropertyString raises TypeError
+# on anything but a str ( None included )
+PROPERTY_TYPES = {
+    "App::PropertyString": str,
+    "App::PropertyFile": str,
+    "App::PropertyStringList": list,
+}
+
+
+class DocumentObject:
+    def __init__(self, doc, typeId, name):
+        self._types = {}
+        self.Document = doc
+        self.TypeId = typeId
+        self.Name = self.Label = name
+        self.InList = []
+        self.Group = []
+        self.PropertiesList = []
+        self.Placement = Placement()
+        if typeId.startswith("Part::"):
+            import Part
+
+            self.Shape = Part.Shape()
+
+    def addProperty(self, typeId, name, group="", doc=""):
+        kind = PROPERTY_TYPES.get(typeId)
+        setattr(self, name, kind() if kind else None)
+        self._types[name] = kind
+        self.PropertiesList.append(name)
+        return self
+
+    def __setattr__(self, name, value):
+        kind = self.__dict__.get("_types", {}).get(name)
+        if kind is not None:
+            if not isinstance(value, kind):
+                raise TypeError(
+                    f"{name} takes {kind.__name__}, not {type(value).__name__}"
+                )
+            if kind is list and not all(isinstance(v, str) for v in value):
+                raise TypeError(f"{name} takes a list of str")
+        object.__setattr__(self, name, value)
+
+    def setEditorMode(self, name, mode):
+        pass
+
+    def addObject(self, obj):
+        self.Group.append(obj)
+        obj.InList.append(self)
+
+    def addObjects(self, objs):
+        for obj in objs:
+            self.addObject(obj)
+
+    def getParentGeoFeatureGroup(self):
+        for obj in self.InList:
+            if obj.TypeId == "App::Part":
+                return obj
+        return None
+
+    def recompute(self):
+        self.Document.recomputes += 1
+
+    def touch(self):
+        pass
+
+
+class Document:
+    def __init__(self, name):
+        self.Name = name
+        self.Objects = []
+        self.recomputes = 0
+        self._names = set()
+
+    def addObject(self, typeId, name=None):
+        base = name or typeId.split("::")[-1]
+        unique, n = base, 0
+        while unique in self._names:
+            n += 1
+            unique = "%s%03d" % (base, n)
+        self._names.add(unique)
+        obj = DocumentObject(self, typeId, unique)
+        self.Objects.append(obj)
+        return obj
+
+    def removeObject(self, name):
+        self.Objects = [o for o in self.Objects if o.Name != name]
+        self._names.discard(name)
+
+    def getObject(self, name):
+        for obj in self.Objects:
+            if obj.Name == name:
+                return obj
+        return None
+
+    def recompute(self):
+        self.recomputes += 1
+
+    def openTransaction(self, name):
+        pass
+
+    def commitTransaction(self):
+        pass
+
+    def abortTransaction(self):
+        pass
+
+
+documents = {}
+ActiveDocument = None
+
+
+def newDocument(name="Unnamed"):
+    global ActiveDocument
+    doc = ActiveDocument = documents[name] = Document(name)
+    return doc
+
+
+def getDocument(name):
+    try:
+        return documents[name]
+    except KeyError:
+        raise NameError("Unknown document '%s'" % name)
+
+
+def closeDocument(name):
+    documents.pop(name, None)
@@ -0,0 +1,214 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Stand-in for FreeCAD's Part module, see FreeCAD.py here. Shapes are
+# trees of sub shapes, BSplines check their poles, knots and multiplicities
+# agree the way OpenCASCADE does.
+
+
+class Shape:
+    def __init__(self, kind="Shape", subs=(), geometry=None):
+        self.kind = kind
+        self.subs = list(subs)
+        self.geometry = geometry
+
+    def _of(self, kind):
+        found = []
+        for s in self.subs:
+            if s.kind == kind:
+                found.append(s)
+            else:
+                found += s._of(kind)
+        return found
+
+    Edges = property(lambda self: self._of("Edge"))
+    Wires = property(lambda self: self._of("Wire") or [Shape("Wire")])
+    Faces = property(lambda self: self._of("Face"))
+    Shells = property(lambda self: self._of("Shell"))
+    Volume = property(lambda self: 1.0)
+
+    def isNull(self):
+        return self.kind == "Shape" and not self.subs and self.geometry is None
+
+    def isValid(self):
+        return True
+
+    def isClosed(self):
+        return True
+
+    def validate(self):
+        pass
+
+    def reverse(self):
+        pass
+
+    def sewShape(self, tolerance=1e-6):
+        self.subs = [Shape("Shell", self.Faces)]
+
+    def copy(self):
+        return Shape(self.kind, self.subs, self.geometry)
+
+    def exportBrep(self, path):
+        with open(path, "w") as fp:
+            fp.write(self.exportBrepToString())
+
+    exportStep = exportBrep
+
+    def exportBrepToString(self):
+        return "brep:" + self.kind
+
+    def importBrepFromString(self, text):
+        self.kind = text.split(":", 1)[1]
+
+    def importBrep(self, path):
+        with open(path) as fp:
+            self.importBrepFromString(fp.read())
+
+    def __repr__(self):
+        return f"<{self.kind} {len(self.subs)}>"
+
+
+class Geometry:
+    def __init__(self, *args):
+        self.args = args
+
+    def toShape(self, *args):
+        kind = "Edge" if isinstance(self, Curve) else "Face"
+        return Shape(kind, geometry=self)
+
+
+class Curve(Geometry):
+    pass
+
+
+class Surface(Geometry):
+    pass
+
+
+class BSplineCurve(Curve):
+    def buildFromPolesMultsKnots(
+        self, poles, mults=None, knots=None, periodic=False, degree=3,
+        weights=None, CheckRational=False,
+    ):
+        assert len(mults) == len(knots)
+        assert periodic or sum(mults) == len(poles) + degree + 1
+        self.poles = poles
+        self.weights = weights
+
+    def setPeriodic(self):
+        pass
+
+
+class BSplineSurface(Surface):
+    def buildFromPolesMultsKnots(
+        self, poles, umults, vmults, uknots=None, vknots=None,
+        uperiodic=False, vperiodic=False, udegree=3, vdegree=3, weights=None,
+    ):
+        assert len(umults) == len(uknots) and len(vmults) == len(vknots)
+        assert uperiodic or sum(umults) == len(poles) + udegree + 1
+        assert vperiodic or sum(vmults) == len(poles[0]) + vdegree + 1
+        self.poles = poles
+        self.weights = weights
+
+
+class LineSegment(Curve):
+    pass
+
+
+class Circle(Curve):
+    XAxis = None
+
+
+class ArcOfCircle(Curve):
+    pass
+
+
+class Ellipse(Curve):
+    pass
+
+
+class ArcOfEllipse(Curve):
+    pass
+
+
+class Plane(Surface):
+    pass
+
+
+class Cylinder(Surface):
+    pass
+
+
+class Cone(Surface):
+    pass
+
+
+class Sphere(Surface):
+    pass
+
+
+class Toroid(Surface):
+    pass
+
+
+OCCError = RuntimeError
+
+
+def Edge(geometry):
+    return Shape("Edge", geometry=geometry)
+
+
+def Wire(edges):
+    return Shape("Wire", edges if isinstance(edges, list) else [edges])
+
+
+def Face(*args):
+    subs = []
+    for a in args:
+        if isinstance(a, Shape):
+            subs.append(a)
+        elif isinstance(a, list):
+            subs += a
+    return Shape("Face", subs)
+
+
+def Shell(faces):
+    return Shape("Shell", faces)
+
+
+def Solid(shell):
+    return Shape("Solid", [shell])
+
+
+def Compound(shapes):
+    return Shape("Compound", shapes)
+
+
+def makePolygon(points):
+    return Shape("Wire", [Shape("Edge") for _ in points[1:]])
+
+
+def sortEdges(edges):
+    return [list(edges)]
@@ -1,2 +1,7 @@
-import FreeCAD
-FreeCAD.addImportType("3DM (*.3dm)","freecad.importNURBS.import3DM")
+try:
+    import FreeCAD
+except ImportError:
+    # used outside FreeCAD, e.g. ir extraction in worker processes
+    FreeCAD = None
+else:
+    FreeCAD.addImportType("3DM (*.3dm)","freecad.importNURBS.import3DM")
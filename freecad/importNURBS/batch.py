@@ -0,0 +1,355 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Headless batch conversion of 3DM files
+#
+#   python -m freecad.importNURBS.batch drops/*.3dm -o out -f fcstd,step -j 8
+#
+# Runs under FreeCADCmd or a plain Python that can import FreeCAD
+# (FreeCAD's lib directory on PYTHONPATH), no GUI is needed.
+
+import argparse, glob, json, os, sys, time, traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+FORMATS = ("fcstd", "brep", "step")
+
+
+def find_files(sources, recursive=False):
+    files = []
+    for src in sources:
+        if os.path.isdir(src):
+            pattern = "**/*.3dm" if recursive else "*.3dm"
+            found = glob.glob(os.path.join(src, pattern), recursive=recursive)
+            found += glob.glob(os.path.join(src, pattern[:-3] + "3DM"), recursive=recursive)
+        elif glob.has_magic(src):
+            found = glob.glob(src, recursive=recursive)
+        else:
+            found = [src]
+        files.extend(sorted(set(found)))
+    return files
+
+
+def output_names(files, outdir):
+    # Output base names without extension, made unique on clashing stems
+    names = []
+    used = set()
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name in used:
+            name = f"{stem}_{n}"
+            n += 1
+        used.add(name)
+        names.append(os.path.join(outdir, name))
+    return names
+
+
+def export_shapes(objs, path, fmt):
+    import Part
+
+    # Skip shapes only used as the base of another feature,
+    # Part.getShape applies App::Link placements
+    shapes = []
+    for o in objs:
+        if any(p.isDerivedFrom("Part::Feature") for p in o.InList):
+            continue
+        shape = Part.getShape(o)
+        if not shape.isNull():
+            shapes.append(shape)
+    com = Part.Compound(shapes)
+    if fmt == "brep":
+        com.exportBrep(path)
+    else:
+        com.exportStep(path)
+
+
+def convert_file(
+    path,
+    outbase,
+    formats,
+    profile=False,
+    cache_dir=None,
+    cache_mb=1024,
+    filters=None,
+    fixes=None,
+):
+    "Convert one 3DM file, returns a report dict. Run in a worker process"
+    # filters : FileIndex.select keyword arguments, convert only matching objects
+    # fixes : validate the shapes before export healing with these, see validate.py
+    import FreeCAD
+
+    result = {"file": path, "outputs": [], "status": "ok"}
+    start = time.perf_counter()
+    doc = None
+    try:
+        from .core import File3dm, VERSION
+        from .metrics import ImportMetrics
+
+        metrics = ImportMetrics() if profile else None
+        cache = None
+        if cache_dir:
+            from .cache import ShapeCache
+
+            cache = ShapeCache(cache_dir, cache_mb << 20, VERSION)
+        fi = File3dm(path, metrics, cache=cache)
+        read = time.perf_counter()
+        selection = None
+        if filters:
+            selection = fi.index().select(**filters)
+            result["selected"] = len(selection)
+        doc = FreeCAD.newDocument(os.path.basename(outbase))
+        objs = fi.parse_objects(doc, deferred=True, selection=selection)
+        converted = time.perf_counter()
+        if fixes is not None:
+            from .validate import summary as checked, validate_objects
+
+            # Files are already spread over the workers, validate serially
+            entries = validate_objects(fi.created, fi.tolerance, fixes, 1)
+            result["validation"] = {
+                "summary": checked(entries),
+                "issues": [e for e in entries if e["issues"]],
+            }
+        for fmt in formats:
+            out = f"{outbase}.{fmt}"
+            if fmt == "fcstd":
+                doc.saveAs(out)
+            else:
+                export_shapes(objs, out, fmt)
+            result["outputs"].append(out)
+        types = {}
+        for o in doc.Objects:
+            types[o.TypeId] = types.get(o.TypeId, 0) + 1
+        result["rhino_objects"] = len(fi.objects)
+        result["objects"] = len(doc.Objects)
+        result["object_types"] = types
+        result["read_seconds"] = read - start
+        result["convert_seconds"] = converted - read
+        if fi.candidates:
+            result["primitives"] = dict(fi.primitives)
+            result["primitive_candidates"] = dict(fi.candidates)
+        if metrics is not None:
+            result["metrics"] = metrics.as_dict()
+        if cache is not None:
+            result["cache"] = cache.stats()
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    finally:
+        if doc is not None:
+            FreeCAD.closeDocument(doc.Name)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def failed(path, error):
+    "Report dict of a file whose conversion did not return one"
+    return {
+        "file": path,
+        "outputs": [],
+        "status": "failed",
+        "error": f"{type(error).__name__}: {error}",
+        "seconds": 0.0,
+    }
+
+
+def convert_isolated(job):
+    "convert_file in a process of its own, a crash only fails this file"
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(convert_file, *job).result()
+        except Exception as e:
+            return failed(job[0], e)
+
+
+def run(
+    files,
+    outdir,
+    formats,
+    workers=None,
+    profile=False,
+    cache_dir=None,
+    cache_mb=1024,
+    filters=None,
+    fixes=None,
+):
+    os.makedirs(outdir, exist_ok=True)
+    jobs = [
+        (path, outbase, formats, profile, cache_dir, cache_mb, filters, fixes)
+        for path, outbase in zip(files, output_names(files, outdir))
+    ]
+    results = []
+    if workers == 1:
+        for job in jobs:
+            results.append(convert_file(*job))
+            print_result(results[-1])
+        return results
+    retry = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(convert_file, *job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool:
+                # A worker died ( a crash in OpenCASCADE, the OOM killer ) and
+                # took the pool with it, unfinished files are tried again
+                retry.append(futures[future])
+                continue
+            except Exception as e:
+                results.append(failed(futures[future][0], e))
+            print_result(results[-1])
+    if retry:
+        print(f"Worker process died, {len(retry)} files converted again one per process")
+        with ThreadPoolExecutor(max_workers=workers) as threads:
+            for result in threads.map(convert_isolated, retry):
+                results.append(result)
+                print_result(result)
+    order = {path: i for i, path in enumerate(files)}
+    results.sort(key=lambda r: order[r["file"]])
+    return results
+
+
+def print_result(r):
+    if r["status"] == "ok":
+        print(f"{r['seconds']:8.2f}s  {r['objects']:6d} objects  {r['file']}")
+    else:
+        print(f"{r['seconds']:8.2f}s  FAILED {r['error']}  {r['file']}")
+
+
+def summary(results, elapsed, workers):
+    failed = [r for r in results if r["status"] != "ok"]
+    return {
+        "files": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "workers": workers,
+        "elapsed_seconds": elapsed,
+        "cpu_seconds": sum(r["seconds"] for r in results),
+        "objects": sum(r.get("objects", 0) for r in results),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m freecad.importNURBS.batch",
+        description="Convert 3DM files to FreeCAD / BREP / STEP without the GUI",
+    )
+    parser.add_argument("sources", nargs="+", help="3dm files, directories or globs")
+    parser.add_argument("-o", "--outdir", default=".", help="output directory")
+    parser.add_argument(
+        "-f",
+        "--formats",
+        default="fcstd",
+        help="comma separated list of " + ",".join(FORMATS),
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument("-r", "--recursive", action="store_true")
+    parser.add_argument("--report", help="write the JSON summary report here")
+    parser.add_argument(
+        "--profile", action="store_true", help="add per geometry type metrics"
+    )
+    parser.add_argument("--cache", help="persistent shape cache directory")
+    parser.add_argument(
+        "--cache-size", type=int, default=1024, help="shape cache size cap in MB"
+    )
+    parser.add_argument(
+        "--layer", action="append", help="only objects on this layer ( repeatable )"
+    )
+    parser.add_argument(
+        "--type", action="append", help="only this geometry type e.g. Brep ( repeatable )"
+    )
+    parser.add_argument(
+        "--box", help="only objects meeting xmin,ymin,zmin,xmax,ymax,zmax"
+    )
+    parser.add_argument(
+        "--inside", action="store_true", help="--box keeps objects wholly inside it"
+    )
+    parser.add_argument(
+        "--validate", action="store_true", help="check the shapes before export"
+    )
+    parser.add_argument(
+        "--fix", help="heal with these e.g. tolerance,sew ( implies --validate )"
+    )
+    args = parser.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    for fmt in formats:
+        if fmt not in FORMATS:
+            parser.error(f"unknown format {fmt}")
+    filters = {}
+    if args.layer:
+        filters["layers"] = args.layer
+    if args.type:
+        filters["types"] = args.type
+    if args.box:
+        try:
+            box = [float(v) for v in args.box.split(",")]
+        except ValueError:
+            box = []
+        if len(box) != 6:
+            parser.error("--box needs six comma separated numbers")
+        filters["box"] = box
+        filters["inside"] = args.inside
+    fixes = None
+    if args.validate or args.fix:
+        fixes = [f.strip() for f in (args.fix or "").split(",") if f.strip()]
+        from .validate import FIXES
+
+        for fix in fixes:
+            if fix not in FIXES:
+                parser.error(f"unknown fix {fix}")
+    files = find_files(args.sources, args.recursive)
+    if not files:
+        parser.error("no 3dm files found")
+
+    start = time.perf_counter()
+    results = run(
+        files,
+        args.outdir,
+        formats,
+        max(1, args.workers),
+        args.profile,
+        args.cache,
+        args.cache_size,
+        filters or None,
+        fixes,
+    )
+    report = summary(results, time.perf_counter() - start, args.workers)
+    print(
+        f"{report['succeeded']}/{report['files']} files converted"
+        f" in {report['elapsed_seconds']:.2f}s with {args.workers} workers"
+    )
+    if args.report:
+        with open(args.report, "w") as fp:
+            json.dump(report, fp, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
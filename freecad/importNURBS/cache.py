@@ -0,0 +1,165 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Persistent conversion cache
+#
+# Converted Part shapes are stored as BREP files under a cache directory,
+# keyed by a hash of the 3dm file contents, the rhino object Id and the
+# importer version, so a changed file or importer never reuses old shapes.
+# Least recently used entries are removed once the cache exceeds its size
+# cap, use is tracked by touching the file modification time on a hit.
+
+import hashlib, os, tempfile
+
+import FreeCAD
+
+from .lazy import LazyModule
+
+Part = LazyModule("Part")
+
+
+def file_hash(path, blocksize=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(blocksize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def default_directory():
+    if hasattr(FreeCAD, "getUserCachePath"):
+        base = FreeCAD.getUserCachePath()
+    else:
+        base = FreeCAD.getUserAppDataDir()
+    return os.path.join(base, "ImportNURBS")
+
+
+class ShapeCache:
+    def __init__(self, directory=None, max_bytes=1 << 30, version=""):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._size = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, *parts):
+        h = hashlib.sha1(self.version.encode())
+        for p in parts:
+            h.update(b"\0" + str(p).encode())
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".brep")
+
+    def contains(self, key):
+        "Whether there is an entry for key, without loading or counting it"
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        "Return the cached Part shape for key or None"
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        shape = Part.Shape()
+        try:
+            shape.importBrep(path)
+        except Exception:
+            # unreadable entry, drop it and convert again
+            os.remove(path)
+            self._size = None
+            self.misses += 1
+            return None
+        self.hits += 1
+        return shape
+
+    def put(self, key, shape):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(suffix=".brep", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            shape.exportBrep(tmp)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.stores += 1
+        if self._size is not None:
+            self._size += os.path.getsize(path)
+
+    def entries(self):
+        for sub in os.scandir(self.directory):
+            if sub.is_dir():
+                for entry in os.scandir(sub.path):
+                    if entry.name.endswith(".brep"):
+                        yield entry
+
+    def size(self):
+        if self._size is None:
+            self._size = sum(e.stat().st_size for e in self.entries())
+        return self._size
+
+    def trim(self):
+        "Remove least recently used entries until the cache fits max_bytes"
+        if self.size() <= self.max_bytes:
+            return
+        entries = sorted(
+            ((e.stat().st_mtime, e.stat().st_size, e.path) for e in self.entries())
+        )
+        self._size = sum(e[1] for e in entries)
+        for mtime, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def clear(self):
+        for entry in list(self.entries()):
+            os.remove(entry.path)
+        self._size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes": self.size(),
+        }
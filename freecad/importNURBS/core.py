@@ -0,0 +1,1469 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Importer core
+#
+# Converts 3dm files into FreeCAD documents without the GUI : File3dm reads
+# a file and converts its objects, converters maps geometry types to
+# handlers. rhino3dm, Part and Mesh are only imported once a file is read,
+# see lazy.py. GUI behaviour ( repaint suppression, progress, selection )
+# is added by import3DM, the module FreeCAD calls to open 3dm files.
+
+import FreeCAD
+import os
+from collections import Counter
+import math, logging
+
+from .geometry import (
+    box_mesh,
+    fc_knots,
+    point_cloud_chunks,
+    to_tuples,
+    VoxelFilter,
+    KNOT_TOLERANCE,
+    POINT_CHUNK,
+)
+from .ir import (
+    brep_ir,
+    curve_ir,
+    curve_key,
+    extract_faces_parallel,
+    face_extraction_pool,
+    extrusion_ir,
+    extract_parallel,
+    mesh_ir,
+    render_mesh_ir,
+    surface_ir,
+    BrepIR,
+    CompoundIR,
+    CurveIR,
+    ExtrusionIR,
+    MeshIR,
+    SurfaceIR,
+    WireIR,
+    wire_ir,
+)
+from .parallel import worker_count
+from .primitives import (
+    ArcIR,
+    ConeIR,
+    CylinderIR,
+    EllipseIR,
+    LineIR,
+    PlaneIR,
+    SphereIR,
+    PRIMITIVE_CURVES,
+    PRIMITIVE_SURFACES,
+)
+from .subd import control_net, subd_mesh, subd_patches
+from .metrics import logger, setup_logging, ImportMetrics
+from .cache import ShapeCache, file_hash
+from .index import fingerprint, FileIndex
+from .preferences import getBool, getFloat, getInt, getString
+from .registry import ConverterRegistry
+from .lazy import LazyModule
+
+import numpy as np
+
+Part = LazyModule("Part")
+r3 = LazyModule("rhino3dm")
+
+VERSION = "0.01"
+
+
+def update(filename, docname):
+    "bring an earlier import of filename in docname up to date"
+    doc = FreeCAD.getDocument(docname)
+    part = findImport(doc, filename)
+    if part is None:
+        raise ValueError("%s was not imported into %s" % (filename, docname))
+    return File3dm(filename).update_objects(doc, part, deferred=True)
+
+
+def toFCvec(r3Dpnt):
+    return FreeCAD.Vector(r3Dpnt.X, r3Dpnt.Y, r3Dpnt.Z)
+
+
+def revision():
+    "FreeCAD's git revision number, None when the build does not give one"
+    try:
+        return int(FreeCAD.Version()[3].split()[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def toFCangle(center, start):
+    return math.atan((start.Y - center.Y) / (start.X - center.Y)) * math.pi / 180
+
+
+def toFCplacement(xform):
+    # Split a rhino Transform into a Placement and a scale vector,
+    # App::Link takes the scale separately. Shear is not representable.
+    m = [getattr(xform, f"M{i}{j}") for i in range(4) for j in range(4)]
+    cols = [(m[0], m[4], m[8]), (m[1], m[5], m[9]), (m[2], m[6], m[10])]
+    scale = [math.sqrt(sum(c * c for c in col)) or 1.0 for col in cols]
+    det = (
+        m[0] * (m[5] * m[10] - m[6] * m[9])
+        - m[1] * (m[4] * m[10] - m[6] * m[8])
+        + m[2] * (m[4] * m[9] - m[5] * m[8])
+    )
+    if det < 0:  # mirrored
+        scale[2] = -scale[2]
+    r = [[cols[j][i] / scale[j] for j in range(3)] for i in range(3)]
+    mat = FreeCAD.Matrix(
+        r[0][0], r[0][1], r[0][2], m[3],
+        r[1][0], r[1][1], r[1][2], m[7],
+        r[2][0], r[2][1], r[2][2], m[11],
+        0.0, 0.0, 0.0, 1.0,
+    )
+    return FreeCAD.Placement(mat), FreeCAD.Vector(*scale)
+
+
+def setCloudPoints(obj, pc, preview="None", chunk=POINT_CHUNK):
+    "Fill a Points feature from a rhino3dm PointCloud, decimated for a preview"
+    # preview : None all points, Stride every n'th point, Voxel one point
+    # per grid cell. Only a chunk of points is converted at a time.
+    import Points
+
+    count = pc.Count
+    stride = 1
+    keep = None
+    # previews aim at about PointCloudPreviewThreshold points
+    target = max(1, getInt("PointCloudPreviewThreshold", 1000000))
+    if preview == "Stride":
+        stride = max(1, getInt("PointCloudStride", 0) or -(-count // target))
+    elif preview == "Voxel":
+        bb = pc.GetBoundingBox()
+        low = np.array((bb.Min.X, bb.Min.Y, bb.Min.Z))
+        high = np.array((bb.Max.X, bb.Max.Y, bb.Max.Z))
+        # default cell size gives target cells over a scanned surface
+        size = getFloat("PointCloudVoxelSize", 0.0)
+        size = size or np.linalg.norm(high - low) / np.sqrt(target)
+        keep = VoxelFilter(low, size or 1.0)
+    fcPoints = Points.Points()
+    colors = []
+    normals = []
+    for points, rgb, normal in point_cloud_chunks(pc, chunk, stride):
+        if keep is not None:
+            index = keep(points)
+            points = points[index]
+            rgb = None if rgb is None else rgb[index]
+            normal = None if normal is None else normal[index]
+        fcPoints.addPoints(to_tuples(points))
+        if rgb is not None:
+            colors.append(rgb)
+        if normal is not None:
+            normals.append(normal)
+    logger.debug("PointCloud %s : %d of %d points", preview, fcPoints.CountPoints, count)
+    obj.Points = fcPoints
+    if colors:
+        if "Color" not in obj.PropertiesList:
+            obj.addProperty("App::PropertyColorList", "Color", "Points")
+        obj.Color = to_tuples(np.concatenate(colors) / 255.0)
+    if normals:
+        if "Normal" not in obj.PropertiesList:
+            obj.addProperty("Points::PropertyNormalList", "Normal", "Points")
+        obj.Normal = to_tuples(np.concatenate(normals).astype(np.float64))
+
+
+def load_full_resolution(obj):
+    "Replace a decimated PointCloud preview by every point from its 3dm file"
+    f3dm = r3.File3dm.Read(obj.SourceFile)
+    rhobj = f3dm.Objects.FindId(obj.RhinoId) if f3dm is not None else None
+    if rhobj is None:
+        raise ValueError(
+            "PointCloud %s not found in %s" % (obj.RhinoId, obj.SourceFile)
+        )
+    setCloudPoints(obj, rhobj.Geometry, "None", getInt("PointCloudChunk", POINT_CHUNK))
+    obj.Preview = "None"
+    obj.recompute()
+    return obj
+
+
+def findImport(doc, filename):
+    "The App::Part an earlier import of filename created in doc, or None"
+    parts = [
+        o
+        for o in doc.Objects
+        if o.TypeId == "App::Part" and "SourceFile" in o.PropertiesList
+    ]
+    # only the same file : a same named file elsewhere is a different
+    # model, updating from it would delete this import's objects
+    path = os.path.normcase(os.path.realpath(filename))
+    for part in parts:
+        if os.path.normcase(os.path.realpath(part.SourceFile)) == path:
+            return part
+    return None
+
+
+def tagObject(obj, rhinoId, fingerprint=""):
+    # Rhino object Id and geometry fingerprint, used by incremental updates
+    for prop, tip in (
+        ("RhinoId", "Id of the Rhino object this was imported from"),
+        ("RhinoFingerprint", "Hash of the Rhino geometry when imported"),
+    ):
+        if prop not in obj.PropertiesList:
+            obj.addProperty("App::PropertyString", prop, "Rhino", tip)
+            obj.setEditorMode(prop, 1)
+    obj.RhinoId = str(rhinoId)
+    obj.RhinoFingerprint = fingerprint or ""
+
+
+def isProxy(obj):
+    return "ProxyType" in obj.PropertiesList
+
+
+# File3dm of the last proxies expanded, so expanding more of them one at a
+# time does not read the file again
+sources = {}
+
+
+def openSource(path):
+    fi = sources.get(path)
+    if fi is None:
+        sources.clear()
+        fi = sources[path] = File3dm(path)
+    return fi
+
+
+def expand_proxies(objs):
+    "Replace proxy placeholders by their exact conversion, returns the new objects"
+    expanded = []
+    for proxy in [o for o in objs if isProxy(o)]:
+        doc = proxy.Document
+        fi = openSource(proxy.SourceFile)
+        rhobj = fi.objects.FindId(proxy.RhinoId)
+        if rhobj is None:
+            logger.warning(
+                "%s %s not found in %s", proxy.ProxyType, proxy.RhinoId, proxy.SourceFile
+            )
+            continue
+        parent = proxy.getParentGeoFeatureGroup()
+        doc.openTransaction("Expand proxy")
+        try:
+            new = fi.import_object(doc, rhobj, rhobj.Geometry)
+            doc.removeObject(proxy.Name)
+            if parent is not None and new:
+                parent.addObjects(new)
+            for obj in new:
+                obj.recompute()
+        except Exception:
+            doc.abortTransaction()
+            raise
+        doc.commitTransaction()
+        expanded += new
+    for fi in sources.values():
+        fi.close_pool()
+    return expanded
+
+
+# Geometry types gathered into layer compounds with CurveCompounds
+CURVE_TYPES = (
+    "ArcCurve",
+    "Curve",
+    "LineCurve",
+    "NurbsCurve",
+    "PolyCurve",
+    "PolylineCurve",
+)
+
+# Properties not carried over when a modified object is updated in place
+KEEP_PROPERTIES = (
+    "Label",
+    "Label2",
+    "ExpressionEngine",
+    "Visibility",
+    "RhinoId",
+)
+
+
+class File3dm:
+    def __init__(self, path, metrics=None, registry=None, cache=None):
+        self.path = path
+        self.f3dm = r3.File3dm.Read(path)
+        # Keep one table, indexing a fresh f3dm.Objects each time is O(n)
+        self.objects = self.f3dm.Objects
+        self.metrics = metrics
+        self.converters = registry if registry is not None else converters
+        self.knot_tolerance = getFloat("KnotTolerance", KNOT_TOLERANCE)
+        # Model space tolerance, used to sew Brep faces
+        self.tolerance = self.f3dm.Settings.ModelAbsoluteTolerance or 1e-3
+        # Curves and surfaces within this of a line, arc, plane, cylinder,
+        # cone or sphere are imported as exact Part geometry, see primitives
+        self.analytic = None
+        if getBool("RecognizePrimitives", True):
+            self.analytic = getFloat("PrimitiveTolerance", 0.0) or self.tolerance
+        # SubD refinement, see convert_subd
+        self.subd_level = getInt("SubDLevel", 2)
+        self.subd_mode = getString("SubDMode", "Mesh")
+        # NURBS curves and surfaces seen, and primitives made of them by type
+        self.candidates = Counter()
+        self.primitives = Counter()
+        self.cache = cache
+        if cache is not None:
+            self.file_hash = file_hash(path)
+        # Deferred imports skip per object recomputes, see parse_objects
+        self.deferred = False
+        # callable( enabled ) the GUI sets to stop repainting while deferred
+        self.set_updates = None
+        # Geometry fingerprints ( see update_part ) encode the whole object,
+        # they are only recorded when imports are to be updated later
+        self.fingerprints = getBool("IncrementalUpdate")
+        # Id of the 3dm object being converted, for handlers that record it
+        self.current_id = None
+        # None, BoundingBox or RenderMesh : convert objects to placeholders
+        # of that kind, see iter_proxies and expand_proxies
+        self.proxies = "None"
+        self.proxy_count = 0
+        # Objects converted, for validateImport
+        self.created = []
+        # Curve edges by curve_key, identical curves are built once
+        self.curve_edges = {}
+        self.curve_hits = 0
+        # Top level curves go into one compound per layer, see layer_compounds
+        self.curve_compounds = getBool("CurveCompounds")
+        self.layer_curves = {}
+        # Workers extracting the faces of large Breps, see convert_brep
+        self.face_pool = None
+        # Instance definitions converted so far, keyed by idef Id
+        self.definitions = {}
+        self.blocks = None
+
+    def index(self):
+        "FileIndex of layers, types and bounding boxes, nothing is converted"
+        return FileIndex(self.f3dm, self.objects)
+
+    def parse_objects(self, doc=None, deferred=False, workers=1, selection=None):
+        # deferred : one undo transaction, no per object recompute or GUI
+        # repaints, and a single document recompute at the end
+        # workers : other than 1, geometry is extracted in a process pool
+        # selection : indices of the objects to convert, see FileIndex.select
+        if not doc:
+            doc = FreeCAD.newDocument("3dm import")
+        return self.transaction(
+            doc, deferred, "Import 3DM", self.convert_objects, doc, workers, selection
+        )
+
+    def update_objects(self, doc, part, deferred=False):
+        # Diff the file against an earlier import into part, see update_part
+        return self.transaction(
+            doc, deferred, "Update 3DM", self.update_part, doc, part
+        )
+
+    def transaction(self, doc, deferred, name, func, *args):
+        if not deferred:
+            return func(*args)
+        self.deferred = True
+        doc.openTransaction(name)
+        if self.set_updates is not None:
+            self.set_updates(False)
+        try:
+            result = func(*args)
+            doc.recompute()
+        except Exception:
+            doc.abortTransaction()
+            raise
+        finally:
+            if self.set_updates is not None:
+                self.set_updates(True)
+            self.deferred = False
+        doc.commitTransaction()
+        return result
+
+    def convert_objects(self, doc, workers=1, selection=None):
+        part = self.import_part(doc)
+        objs = []
+        for name, new in self.iter_objects(doc, workers, selection):
+            objs += new
+        if objs:
+            part.addObjects(objs)
+        self.finish()
+        return objs
+
+    def import_part(self, doc):
+        part = doc.addObject("App::Part", "Part")
+        # Where the objects came from, see findImport
+        part.addProperty("App::PropertyFile", "SourceFile", "Rhino")
+        part.SourceFile = self.path
+        return part
+
+    def finish(self):
+        if self.metrics is not None:
+            self.metrics.finish()
+        if self.cache is not None:
+            self.cache.trim()
+        self.curve_edges.clear()
+        # not carried into the next conversion with this File3dm
+        self.layer_curves = {}
+        self.close_pool()
+
+    def close_pool(self):
+        if self.face_pool is not None:
+            self.face_pool.shutdown()
+            self.face_pool = None
+
+    def iter_objects(self, doc, workers=1, selection=None):
+        "Convert objects one at a time, yielding ( type name, new objects )"
+        if self.proxies != "None":
+            return self.iter_proxies(doc, selection)
+        if worker_count(workers) > 1:
+            objects = self.iter_records(doc, workers, selection)
+        else:
+            objects = self.iter_serial(doc, selection)
+        if self.curve_compounds:
+            return self.iter_compounds(doc, objects)
+        return objects
+
+    def iter_compounds(self, doc, objects):
+        # the curves were collected by layer while converting
+        yield from objects
+        for obj in self.layer_compounds(doc):
+            yield "Curves", [obj]
+
+    def iter_serial(self, doc, selection=None):
+        metrics = self.metrics
+        debug = logger.isEnabledFor(logging.DEBUG)
+        objects = self.objects
+        if selection is not None:
+            objects = (self.objects[i] for i in selection)
+        for rhobj in objects:
+            attributes = rhobj.Attributes
+            if attributes.IsInstanceDefinitionObject:
+                # converted once with its definition, placed by App::Links
+                continue
+            geo = rhobj.Geometry
+            name = type(geo).__name__
+            if debug:
+                logger.debug("-----------------\n%s", name)
+            if self.curve_compounds and name in CURVE_TYPES:
+                self.add_layer_curve(
+                    doc,
+                    attributes.LayerIndex,
+                    attributes.Id,
+                    wire_ir(geo, self.knot_tolerance, self.analytic),
+                    fingerprint(geo) if self.fingerprints else "",
+                )
+                yield name, []
+            elif metrics is None:
+                yield name, self.import_object(doc, rhobj, geo)
+            else:
+                yield name, metrics.measure(name, self.import_object, doc, rhobj, geo)
+
+    def iter_records(self, doc, workers, selection=None):
+        # Workers extract ObjectIR records, built here in file order while
+        # later chunks are still being extracted
+        metrics = self.metrics
+        if selection is None:
+            selection = range(len(self.objects))
+        if self.cache is not None:
+            # cache hits are read here, only the rest goes to the workers
+            selection, hits = self.split_cached(selection)
+            for i in hits:
+                rhobj = self.objects[i]
+                geo = rhobj.Geometry
+                name = type(geo).__name__
+                if metrics is None:
+                    yield name, self.import_object(doc, rhobj, geo)
+                else:
+                    yield name, metrics.measure(
+                        name, self.import_object, doc, rhobj, geo
+                    )
+        records = ()
+        if len(selection):
+            records = extract_parallel(
+                self.path,
+                selection,
+                workers,
+                self.knot_tolerance,
+                self.analytic,
+                self.fingerprints,
+            )
+        for rec in records:
+            if rec.definition:
+                continue
+            if self.curve_compounds and rec.type_name in CURVE_TYPES:
+                geometry = rec.geometry
+                if geometry is None:
+                    geo = self.objects[rec.index].Geometry
+                    geometry = wire_ir(geo, self.knot_tolerance, self.analytic)
+                self.add_layer_curve(
+                    doc, rec.layer, rec.id, geometry, rec.fingerprint
+                )
+                yield rec.type_name, []
+            elif metrics is None:
+                yield rec.type_name, self.import_record(doc, rec)
+            else:
+                yield rec.type_name, metrics.measure(
+                    rec.type_name, self.import_record, doc, rec
+                )
+
+    def split_cached(self, selection):
+        "( indices to extract, indices with a cached shape )"
+        extract = []
+        hits = []
+        for i in selection:
+            rhobj = self.objects[i]
+            attributes = rhobj.Attributes
+            if (
+                not attributes.IsInstanceDefinitionObject
+                and not (
+                    self.curve_compounds
+                    and type(rhobj.Geometry).__name__ in CURVE_TYPES
+                )
+                and self.cache.contains(self.cache_key(attributes.Id))
+            ):
+                hits.append(i)
+            else:
+                extract.append(i)
+        return extract, hits
+
+    def add_layer_curve(self, doc, layer, id, geometry, fprint=""):
+        ids, fprints, shapes = self.layer_curves.setdefault(layer, ([], [], []))
+        ids.append(str(id))
+        fprints.append(fprint or "")
+        shapes.append(self.build(doc, geometry))
+
+    def layer_id(self, layer):
+        layers = self.f3dm.Layers
+        return str(layers[layer].Id) if 0 <= layer < len(layers) else ""
+
+    def layer_compounds(self, doc):
+        "One Part::Feature per layer holding the curves collected on it"
+        layers = self.f3dm.Layers
+        objs = []
+        for layer, (ids, fprints, shapes) in sorted(self.layer_curves.items()):
+            obj = doc.addObject("Part::Feature", "Curves")
+            if 0 <= layer < len(layers):
+                obj.Label = "Curves " + layers[layer].FullPath
+            obj.Shape = Part.Compound(shapes)
+            # what update_part needs to tell which curves changed
+            for prop, kind, tip in (
+                ("RhinoLayer", "App::PropertyString", "Id of the Rhino layer"),
+                ("RhinoIds", "App::PropertyStringList", "Rhino curves in this"),
+                (
+                    "RhinoFingerprints",
+                    "App::PropertyStringList",
+                    "Hashes of the Rhino curves when imported",
+                ),
+            ):
+                obj.addProperty(kind, prop, "Rhino", tip)
+                obj.setEditorMode(prop, 1)
+            obj.RhinoLayer = self.layer_id(layer)
+            obj.RhinoIds = ids
+            obj.RhinoFingerprints = fprints
+            objs.append(obj)
+        self.layer_curves = {}
+        self.created += objs
+        return objs
+
+    def iter_proxies(self, doc, selection=None):
+        # Placeholders from the bounding boxes ( and render meshes ) alone,
+        # objects without a valid box are converted as usual
+        index = self.index()
+        if selection is None:
+            selection = np.flatnonzero(~index.definition)
+        for i in selection:
+            rhobj = self.objects[int(i)]
+            geo = rhobj.Geometry
+            name = type(geo).__name__
+            box = index.boxes[i]
+            if np.isnan(box).any():
+                yield name, self.import_object(doc, rhobj, geo)
+            else:
+                yield name, [self.proxy_object(doc, rhobj, geo, box)]
+
+    def proxy_object(self, doc, rhobj, geo, box):
+        m = None
+        if self.proxies == "RenderMesh":
+            m = render_mesh_ir(geo)
+        mode = "Flat Lines"
+        if m is None:
+            m = MeshIR(*box_mesh(box[:3], box[3:]))
+            mode = "Wireframe"
+        obj = self.build_mesh(doc, m)
+        obj.Label = type(geo).__name__ + " proxy"
+        # what expand_proxies needs to convert the object itself
+        tagObject(obj, rhobj.Attributes.Id)
+        obj.addProperty("App::PropertyFile", "SourceFile", "Rhino")
+        obj.SourceFile = self.path
+        obj.addProperty(
+            "App::PropertyString", "ProxyType", "Rhino", "Geometry type this stands for"
+        )
+        obj.ProxyType = type(geo).__name__
+        obj.setEditorMode("ProxyType", 1)
+        if FreeCAD.GuiUp:
+            obj.ViewObject.DisplayMode = mode
+        self.proxy_count += 1
+        return obj
+
+    def import_record(self, doc, rec):
+        if rec.geometry is None:
+            # no extractor for this type, convert from the 3dm object
+            rhobj = self.objects[rec.index]
+            return self.import_object(doc, rhobj, rhobj.Geometry)
+        objs = self.cached(
+            doc, rec.id, rec.type_name,
+            lambda: self.to_objects(doc, self.build(doc, rec.geometry), rec.type_name),
+        )
+        for obj in objs:
+            tagObject(obj, rec.id, rec.fingerprint)
+        self.created += objs
+        return objs
+
+    def import_object(self, doc, rhobj, geo, fprint=None):
+        # Convert one File3dm object, through the shape cache if there is one
+        rhinoId = rhobj.Attributes.Id
+        if fprint is None and self.fingerprints:
+            # before converting reads the geometry, see fingerprint
+            fprint = fingerprint(geo)
+        objs = self.cached(
+            doc, rhinoId, type(geo).__name__,
+            lambda: self.import_geometry(doc, geo),
+        )
+        if objs:
+            for obj in objs:
+                tagObject(obj, rhinoId, fprint)
+            self.created += objs
+        return objs
+
+    def update_part(self, doc, part):
+        """Convert objects added or modified since part was imported and
+        remove deleted ones, unchanged objects are left alone"""
+        previous = {}
+        # layer id : compound, curve id : ( layer id, fingerprint )
+        compounds = {}
+        compounded = {}
+        for obj in part.Group:
+            if "RhinoFingerprint" in obj.PropertiesList:
+                previous.setdefault(obj.RhinoId, []).append(obj)
+            elif "RhinoIds" in obj.PropertiesList:
+                compounds[obj.RhinoLayer] = obj
+                for rhinoId, fprint in zip(obj.RhinoIds, obj.RhinoFingerprints):
+                    compounded[rhinoId] = (obj.RhinoLayer, fprint)
+        self.reuse_blocks(doc)
+        counts = {"added": 0, "modified": 0, "deleted": 0, "unchanged": 0}
+        seen = set()
+        objs = []
+        # curves of each layer compound, and layers whose compound is rebuilt
+        layer_curves = {}
+        stale = set()
+        for rhobj in self.objects:
+            attributes = rhobj.Attributes
+            if attributes.IsInstanceDefinitionObject:
+                continue
+            rhinoId = str(attributes.Id)
+            seen.add(rhinoId)
+            geo = rhobj.Geometry
+            if rhinoId in compounded or (
+                self.curve_compounds
+                and rhinoId not in previous
+                and type(geo).__name__ in CURVE_TYPES
+            ):
+                layer = self.layer_id(attributes.LayerIndex)
+                fprint = fingerprint(geo)
+                layer_curves.setdefault(layer, []).append((rhobj, fprint))
+                if rhinoId not in compounded:
+                    counts["added"] += 1
+                    stale.add(layer)
+                elif compounded[rhinoId] != (layer, fprint):
+                    counts["modified"] += 1
+                    stale.update((layer, compounded[rhinoId][0]))
+                else:
+                    counts["unchanged"] += 1
+                continue
+            old = previous.get(rhinoId)
+            if old and all(isProxy(o) for o in old):
+                # converted from the current file when expanded
+                counts["unchanged"] += 1
+                continue
+            fprint = fingerprint(geo)
+            if old and all(o.RhinoFingerprint == fprint for o in old):
+                counts["unchanged"] += 1
+                continue
+            new = self.import_object(doc, rhobj, geo, fprint)
+            if old:
+                counts["modified"] += 1
+                new = self.replace_objects(doc, old, new)
+            else:
+                counts["added"] += 1
+            objs += new
+        for rhinoId, old in previous.items():
+            if rhinoId not in seen:
+                counts["deleted"] += 1
+                for obj in old:
+                    doc.removeObject(obj.Name)
+        for rhinoId, (layer, _) in compounded.items():
+            if rhinoId not in seen:
+                counts["deleted"] += 1
+                stale.add(layer)
+        objs += self.update_compounds(doc, compounds, layer_curves, stale)
+        if objs:
+            part.addObjects(objs)
+        part.SourceFile = self.path
+        self.finish()
+        return counts
+
+    def update_compounds(self, doc, compounds, layer_curves, stale):
+        # A compound is one shape, so one changed curve rebuilds its layer's
+        # compound from all the layer's curves. Returns the new compounds
+        for layer in stale:
+            for rhobj, fprint in layer_curves.get(layer, ()):
+                self.add_layer_curve(
+                    doc,
+                    rhobj.Attributes.LayerIndex,
+                    rhobj.Attributes.Id,
+                    wire_ir(rhobj.Geometry, self.knot_tolerance, self.analytic),
+                    fprint,
+                )
+        objs = []
+        for obj in self.layer_compounds(doc):
+            old = compounds.get(obj.RhinoLayer)
+            if old is None:
+                objs.append(obj)
+            else:
+                self.replace_objects(doc, [old], [obj])
+        for layer in stale:
+            if layer in compounds and layer not in layer_curves:
+                # every curve of the layer was deleted
+                doc.removeObject(compounds[layer].Name)
+        return objs
+
+    def replace_objects(self, doc, old, new):
+        """Put modified geometry into the old objects where the conversion
+        gives a like for like object, so they keep their identity and their
+        dependents. Returns the new objects still to be placed"""
+        if len(old) == len(new) and all(
+            o.TypeId == n.TypeId for o, n in zip(old, new)
+        ):
+            # links between the new objects ( an extrusion's profile ) are
+            # pointed at the matching old ones
+            targets = {n.Name: o for o, n in zip(old, new)}
+            for target, source in zip(old, new):
+                for prop in source.PropertiesList:
+                    if prop in KEEP_PROPERTIES:
+                        continue
+                    value = getattr(source, prop)
+                    if isinstance(value, FreeCAD.DocumentObject):
+                        value = targets.get(value.Name, value)
+                    try:
+                        setattr(target, prop, value)
+                    except Exception:
+                        # read only and output properties
+                        pass
+            for target, source in reversed(list(zip(old, new))):
+                doc.removeObject(source.Name)
+                self.created.remove(source)
+                self.created.append(target)
+            for target in old:
+                self.recompute(target)
+            return []
+        logger.info(
+            "Rhino object %s replaced, objects depending on it need relinking",
+            old[0].RhinoId,
+        )
+        for obj in old:
+            doc.removeObject(obj.Name)
+        return new
+
+    def reuse_blocks(self, doc):
+        # Block definitions from the earlier import are used as they are
+        for obj in doc.Objects:
+            if obj.TypeId == "App::DocumentObjectGroup" and obj.Name.startswith("Blocks"):
+                for block in obj.Group:
+                    if "RhinoId" in block.PropertiesList:
+                        self.blocks = obj
+                        self.definitions[block.RhinoId] = block
+
+    def cache_key(self, id):
+        # every setting that changes the shape built is part of the key
+        return self.cache.key(
+            self.file_hash,
+            id,
+            self.knot_tolerance,
+            self.analytic,
+            self.subd_level,
+            self.subd_mode,
+        )
+
+    def cached(self, doc, id, name, convert):
+        self.current_id = id
+        cache = self.cache
+        if cache is None:
+            return convert()
+        key = self.cache_key(id)
+        shape = cache.get(key)
+        if shape is not None:
+            obj = doc.addObject("Part::Feature", name)
+            obj.Shape = shape
+            return [obj]
+        objs = convert()
+        # Only plain shapes are cached, parametric objects are cheap to rebuild
+        if len(objs) == 1 and objs[0].TypeId == "Part::Feature":
+            cache.put(key, objs[0].Shape)
+        return objs
+
+    def import_geometry(self, doc, geo):
+        # Convert one rhino3dm geometry, returns a list of document objects
+        handler = self.converters.resolve(type(geo))
+        if handler is None:
+            logger.info("%s not yet handled", type(geo).__name__)
+            return []
+        return self.to_objects(doc, handler(self, doc, geo), type(geo).__name__)
+
+    def recompute(self, obj):
+        if not self.deferred:
+            obj.recompute()
+
+    def instance_definition(self, doc, idefId):
+        "Return the App::Part holding a block definition, converting it once"
+        key = str(idefId)
+        if key in self.definitions:
+            return self.definitions[key]
+        self.definitions[key] = None  # guards against self referencing blocks
+        idef = self.f3dm.InstanceDefinitions.FindId(idefId)
+        if idef is None:
+            logger.warning("Instance definition %s not found", key)
+            return None
+        if self.blocks is None:
+            self.blocks = doc.addObject("App::DocumentObjectGroup", "Blocks")
+        block = doc.addObject("App::Part", "Block")
+        block.Label = idef.Name or "Block"
+        objs = []
+        for oid in idef.GetObjectIds():
+            rhobj = self.objects.FindId(oid)
+            if rhobj is not None:
+                objs += self.import_object(doc, rhobj, rhobj.Geometry)
+        if objs:
+            block.addObjects(objs)
+        block.Visibility = False
+        tagObject(block, key)
+        self.blocks.addObject(block)
+        self.definitions[key] = block
+        return block
+
+    def to_objects(self, doc, result, name):
+        # Handlers return a document object, a Part shape, a list or None
+        if result is None:
+            return []
+        if isinstance(result, (list, tuple)):
+            objs = []
+            for r in result:
+                objs += self.to_objects(doc, r, name)
+            return objs
+        if isinstance(result, Part.Shape):
+            obj = doc.addObject("Part::Feature", name)
+            obj.Shape = result
+            return [obj]
+        return [result]
+
+    ##########################################
+    #
+    # Converters registered per geometry type
+    #
+    ###########################################
+    def convert_brep(self, doc, geo):
+        logger.debug(
+            "Brep object solid=%s manifold=%s surface=%s"
+            " faces=%d surfaces=%d edges=%d",
+            geo.IsSolid,
+            geo.IsManifold,
+            geo.IsSurface,
+            len(geo.Faces),
+            len(geo.Surfaces),
+            len(geo.Edges),
+        )
+        count = len(geo.Faces)
+        faces = None
+        workers = worker_count(getInt("Workers", 1))
+        if workers > 1 and count >= getInt("ParallelFaceThreshold", 500):
+            # large polysurfaces have their faces extracted in a process pool,
+            # started once for the file and kept until finish
+            if self.face_pool is None:
+                self.face_pool = face_extraction_pool(self.path, workers)
+            faces = extract_faces_parallel(
+                self.face_pool,
+                workers,
+                self.current_id,
+                count,
+                self.knot_tolerance,
+                self.analytic,
+            )
+        return self.build_brep(brep_ir(geo, self.knot_tolerance, self.analytic, faces))
+
+    def convert_line_curve(self, doc, geo):
+        obj = doc.addObject("Part::Line", "Line Curve?")
+        obj.X1 = geo.PointAtStart.X
+        obj.Y1 = geo.PointAtStart.Y
+        obj.Z1 = geo.PointAtStart.Z
+        obj.X2 = geo.PointAtEnd.X
+        obj.Y2 = geo.PointAtEnd.Y
+        obj.Z2 = geo.PointAtEnd.Z
+        self.recompute(obj)
+        return obj
+
+    def convert_nurbs_curve(self, doc, geo):
+        obj = doc.addObject("Part::Feature", "NurbsCurve")
+        obj.Shape = self.curve_shape(curve_ir(geo, self.knot_tolerance, self.analytic))
+        return obj
+
+    def convert_arc_curve(self, doc, geo):
+        obj = doc.addObject("Part::Circle", "Arc")
+        obj.Placement.Base = toFCvec(geo.Arc.Center)
+        obj.Radius = geo.Radius
+        # Part::Circle's angles were renamed in revision 29603, builds
+        # without a revision number are taken to be newer
+        rev = revision()
+        if rev is None or rev > 29603:
+            obj.Angle1 = startAngle = toFCangle(geo.Arc.Center, geo.PointAtStart)
+            obj.Angle2 = startAngle + geo.Arc.AngleDegrees
+        else:
+            obj.Angle0 = startAngle = toFCangle(geo.Arc.Center, geo.PointAtStart)
+            obj.Angle1 = startAngle + geo.Arc.AngleDegrees
+        self.recompute(obj)
+        return obj
+
+    def convert_bezier_curve(self, doc, geo):
+        obj = doc.addObject("Part::Feature", "Bezier")
+        obj.Shape = self.curve_shape(curve_ir(geo, self.knot_tolerance, self.analytic))
+        self.recompute(obj)
+        return obj
+
+    def convert_polyline_curve(self, doc, geo):
+        logger.debug("PolyLineCurve point count %d", geo.PointCount)
+        obj = doc.addObject("Part::Polygon", "PolyLine Curve?")
+        pList = []
+        for i in range(geo.PointCount):
+            p = geo.Point(i)
+            pList.append(FreeCAD.Vector(p.X, p.Y, p.Z))
+        # obj.Shape = Part.makePolygon(pList)
+        obj.Nodes = pList
+        self.recompute(obj)
+        return obj
+
+    def convert_poly_curve(self, doc, geo):
+        # a wire of the segments, each converted natively
+        obj = doc.addObject("Part::Feature", "PolyCurve")
+        obj.Shape = self.wire_shape(wire_ir(geo, self.knot_tolerance, self.analytic))
+        self.recompute(obj)
+        return obj
+
+    def convert_curve(self, doc, geo):
+        # Any other curve type, segment by segment
+        if logger.isEnabledFor(logging.DEBUG):
+            self.printCurveInfo(geo)
+        return self.wire_shape(wire_ir(geo, self.knot_tolerance, self.analytic))
+
+    def convert_instance_reference(self, doc, geo):
+        block = self.instance_definition(doc, geo.ParentIdefId)
+        if block is None:
+            return None
+        link = doc.addObject("App::Link", "Link")
+        link.Label = block.Label
+        link.LinkedObject = block
+        placement, scale = toFCplacement(geo.Xform)
+        link.Placement = placement
+        if (scale - FreeCAD.Vector(1, 1, 1)).Length > 1e-12:
+            link.ScaleVector = scale
+        return link
+
+    def convert_extrusion(self, doc, geo):
+        logger.debug(
+            "Extrusion PathStart=%s PathEnd=%s ProfileCount=%d capped=%s,%s",
+            geo.PathStart,
+            geo.PathEnd,
+            geo.ProfileCount,
+            geo.IsCappedAtBottom,
+            geo.IsCappedAtTop,
+        )
+        return self.build(doc, extrusion_ir(geo, self.knot_tolerance, self.analytic))
+
+    def convert_mesh(self, doc, geo):
+        logger.info(
+            "Mesh Object ← NURBS not preserved by exporter"
+            "  quads=%d  triangles=%d  vertices=%d",
+            geo.Faces.QuadCount,
+            geo.Faces.TriangleCount,
+            len(geo.Vertices),
+        )
+        return self.create_mesh(doc, geo)
+
+    def convert_nurbs_surface(self, doc, geo):
+        logger.info(
+            "NurbsSurface Object  degree=(%d,%d)  cvs=(%d,%d)  rational=%s"
+            "  knots U=%d  V=%d",
+            geo.Degree(0),
+            geo.Degree(1),
+            geo.Points.CountU,
+            geo.Points.CountV,
+            geo.IsRational,
+            len(geo.KnotsU),
+            len(geo.KnotsV),
+        )
+        obj = doc.addObject("Part::Feature", "NurbsSurface")
+        obj.Shape = self.surface_shape(
+            surface_ir(geo, self.knot_tolerance, self.analytic, bounded=True)
+        )
+        return obj
+
+    def convert_point_cloud(self, doc, geo):
+        logger.info(
+            "PointCloud Object  points=%d  colors=%s  normals=%s",
+            geo.Count,
+            geo.ContainsColors,
+            geo.ContainsNormals,
+        )
+        preview = "None"
+        if geo.Count > getInt("PointCloudPreviewThreshold", 1000000):
+            preview = getString("PointCloudPreview", "None")
+        # Colors and normals are dynamic properties, kept by FeatureCustom
+        custom = geo.ContainsColors or geo.ContainsNormals
+        obj = doc.addObject(
+            "Points::FeatureCustom" if custom else "Points::Feature", "PointCloud"
+        )
+        setCloudPoints(obj, geo, preview, getInt("PointCloudChunk", POINT_CHUNK))
+        if preview != "None":
+            # Where to find the full cloud, see load_full_resolution
+            # ( with the RhinoId every imported object gets )
+            obj.addProperty("App::PropertyFile", "SourceFile", "Rhino")
+            obj.addProperty("App::PropertyString", "Preview", "Rhino")
+            obj.SourceFile = self.path
+            obj.Preview = preview
+        if self.metrics is not None:
+            self.metrics.add(control_points=obj.Points.CountPoints)
+        return obj
+
+    def convert_surface(self, doc, geo):
+        logger.info("Surface Object not yet handled")
+
+    def convert_subd(self, doc, geo):
+        # Catmull-Clark refined SubDLevel times ( 0 the control net itself )
+        # and imported as a limit surface mesh, or NURBS patches sewn up
+        level = self.subd_level
+        net = control_net(geo)
+        logger.debug(
+            "SubD faces=%d vertices=%d creases=%d level=%d",
+            net.face_count,
+            len(net.points),
+            len(net.creases),
+            level,
+        )
+        if self.subd_mode == "NURBS":
+            faces = [self.surface_shape(s) for s in subd_patches(net, level)]
+            return self.sew_faces(faces, geo.IsSolid)
+        return self.build_mesh(doc, subd_mesh(net, level))
+
+    def printCurveInfo(self, geo):
+        logger.debug(
+            "Curve Info IsArc=%s IsCircle=%s IsEllipse=%s IsPolyline=%s",
+            geo.IsArc(),
+            geo.IsCircle(),
+            geo.IsEllipse(),
+            geo.IsPolyline(),
+        )
+        if hasattr(geo,'SegmentCount') :
+           logger.debug("  SegmentCount=%d", geo.SegmentCount)
+
+    ##########################################
+    #
+    # Create functions return a Part Shape
+    #
+    ###########################################
+    def create_curve(self, edge):
+        return self.build_curve(curve_ir(edge, self.knot_tolerance, self.analytic))
+
+    def create_surface(self, surf):
+        logger.debug("Create Surface %s", surf.ObjectType)
+        nu = surf.ToNurbsSurface()
+        return self.create_nurbs_surface(nu)
+
+    def create_nurbs_surface(self, nurbSurf):
+        nu = nurbSurf
+        logger.debug(
+            "NurbsSurface degree %d x %d CountU : %d CountV : %d",
+            nu.Degree(0),
+            nu.Degree(1),
+            nu.Points.CountU,
+            nu.Points.CountV,
+        )
+        return self.bspline_surface(surface_ir(nu, self.knot_tolerance))
+
+    def getFCKnots(self, fknots):
+        return fc_knots(fknots, self.knot_tolerance)
+
+    def create_mesh(self, doc, r3mesh):
+        # Return Object Mesh
+        return self.build_mesh(doc, mesh_ir(r3mesh))
+
+    ##########################################
+    #
+    # Build functions turn ir records into FreeCAD geometry
+    #
+    ###########################################
+    def build(self, doc, geometry):
+        if isinstance(geometry, (CurveIR,) + PRIMITIVE_CURVES):
+            return self.curve_shape(geometry)
+        if isinstance(geometry, WireIR):
+            return self.wire_shape(geometry)
+        if isinstance(geometry, (SurfaceIR,) + PRIMITIVE_SURFACES):
+            return self.surface_shape(geometry)
+        if isinstance(geometry, BrepIR):
+            return self.build_brep(geometry)
+        if isinstance(geometry, ExtrusionIR):
+            return self.build_extrusion(doc, geometry)
+        if isinstance(geometry, MeshIR):
+            return self.build_mesh(doc, geometry)
+        if isinstance(geometry, CompoundIR):
+            return Part.Compound([self.build(doc, g) for g in geometry.parts])
+        raise TypeError("No builder for %s" % type(geometry).__name__)
+
+    def curve_shape(self, c):
+        "Edge of a curve record, identical curves share one edge"
+        key = curve_key(c)
+        edge = self.curve_edges.get(key)
+        if edge is None:
+            edge = self.curve_edges[key] = self.build_curve(c).toShape()
+        else:
+            self.curve_hits += 1
+        return edge
+
+    def wire_shape(self, w, as_wire=False):
+        "Wire of a WireIR's edges, a single edge stays an edge unless as_wire"
+        edges = [self.curve_shape(c) for c in w.edges]
+        if len(edges) == 1 and not as_wire:
+            return edges[0]
+        try:
+            return Part.Wire(edges)
+        except Part.OCCError:
+            # segments that do not join stay separate edges
+            logger.info("Curve segments do not join, importing them as edges")
+            return Part.Compound(edges)
+
+    def build_curve(self, c):
+        self.candidates["curves"] += 1
+        if isinstance(c, LineIR):
+            self.primitives["Line"] += 1
+            return Part.LineSegment(FreeCAD.Vector(*c.start), FreeCAD.Vector(*c.end))
+        if isinstance(c, ArcIR):
+            self.primitives["Circle" if c.closed else "Arc"] += 1
+            circle = Part.Circle(
+                FreeCAD.Vector(*c.center), FreeCAD.Vector(*c.normal), c.radius
+            )
+            # parameter 0 at the curve start, so vertices match the 3dm ones
+            circle.XAxis = FreeCAD.Vector(*c.xaxis)
+            if c.closed:
+                return circle
+            return Part.ArcOfCircle(circle, 0.0, c.angle)
+        if isinstance(c, EllipseIR):
+            self.primitives["Ellipse"] += 1
+            center = FreeCAD.Vector(*c.center)
+            ellipse = Part.Ellipse(
+                center + FreeCAD.Vector(*c.major) * c.major_radius,
+                center + FreeCAD.Vector(*c.minor) * c.minor_radius,
+                center,
+            )
+            # a full turn from the curve start, so the seam vertex matches
+            return Part.ArcOfEllipse(ellipse, c.start, c.start + 2 * math.pi)
+        if self.metrics is not None:
+            self.metrics.add(control_points=len(c.poles))
+        periodic = False  # set afterwards, see below
+        args = [to_tuples(c.poles), c.mults, c.knots, periodic, c.degree]
+        if c.weights is not None:
+            args.append(c.weights.tolist())
+        bs = Part.BSplineCurve()
+        bs.buildFromPolesMultsKnots(*args)
+        if c.periodic:
+            bs.setPeriodic()
+        return bs
+
+    def build_surface(self, s):
+        self.candidates["surfaces"] += 1
+        if isinstance(s, SurfaceIR):
+            return self.bspline_surface(s)
+        self.primitives[type(s).__name__[:-2]] += 1
+        if isinstance(s, PlaneIR):
+            return Part.Plane(FreeCAD.Vector(*s.origin), FreeCAD.Vector(*s.normal))
+        if isinstance(s, CylinderIR):
+            surface = Part.Cylinder()
+            surface.Center = FreeCAD.Vector(*s.center)
+            surface.Axis = FreeCAD.Vector(*s.axis)
+            surface.Radius = s.radius
+            return surface
+        if isinstance(s, ConeIR):
+            return Part.Cone(
+                FreeCAD.Vector(*s.point1),
+                FreeCAD.Vector(*s.point2),
+                s.radius1,
+                s.radius2,
+            )
+        if isinstance(s, SphereIR):
+            surface = Part.Sphere()
+            surface.Center = FreeCAD.Vector(*s.center)
+            surface.Radius = s.radius
+            return surface
+        raise TypeError("No builder for %s" % type(s).__name__)
+
+    def surface_shape(self, s):
+        "Face of a standalone surface, primitives are bounded by their NURBS edges"
+        surface = self.build_surface(s)
+        if getattr(s, "nurbs", None) is None:
+            return surface.toShape()
+        face = Part.Face(surface, self.bspline_surface(s.nurbs).toShape().Wires)
+        face.validate()
+        if s.flip:
+            face.reverse()
+        return face
+
+    def bspline_surface(self, s):
+        if self.metrics is not None:
+            self.metrics.add(control_points=s.poles.shape[0] * s.poles.shape[1])
+        uperiodic = False
+        vperiodic = False
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ku mu %s %s", s.uknots, s.umults)
+            logger.debug("kv mv %s %s", s.vknots, s.vmults)
+        args = [
+            to_tuples(s.poles),
+            s.umults,
+            s.vmults,
+            s.uknots,
+            s.vknots,
+            uperiodic,
+            vperiodic,
+            s.udegree,
+            s.vdegree,
+        ]
+        if s.weights is not None:
+            args.append(s.weights.tolist())
+        bs = Part.BSplineSurface()
+        bs.buildFromPolesMultsKnots(*args)
+        return bs
+
+    def build_brep(self, b):
+        "Trimmed faces sewn into a shell or solid"
+        edges = {}
+
+        def edge(i):
+            # each Brep edge is built once and shared by its faces
+            if i not in edges:
+                edges[i] = self.build_curve(b.edges[i]).toShape()
+            return edges[i]
+
+        faces = []
+        for i, f in enumerate(b.faces):
+            try:
+                faces.append(self.build_face(f, edge))
+            except Exception as e:
+                logger.warning("Brep face %d not converted : %s", i, e)
+        if not faces:
+            logger.warning("Brep has no convertible faces, importing its edges")
+            return Part.Compound([edge(i) for i in range(len(b.edges))])
+        return self.sew_faces(faces, b.solid)
+
+    def sew_faces(self, faces, as_solid=False):
+        "Faces sewn into a shell, or a solid when as_solid and the shell closes"
+        shape = Part.Compound(faces)
+        if len(faces) > 1:
+            shape.sewShape(self.tolerance)
+        shells = shape.Shells
+        if len(shells) != 1:
+            return shape
+        if as_solid and shells[0].isClosed():
+            solid = Part.Solid(shells[0])
+            if solid.Volume < 0:
+                solid.reverse()
+            return solid
+        return shells[0]
+
+    def build_face(self, f, edge):
+        surface = self.build_surface(f.surface)
+        wires = []
+        for loop in f.loops:
+            # A seam edge is trimmed twice by its loop, once each way. It is
+            # left out and the face fix puts the seam back.
+            counts = Counter(e for e, _ in loop)
+            loopEdges = [edge(e) for e, _ in loop if counts[e] == 1]
+            if loopEdges:
+                wires += [Part.Wire(group) for group in Part.sortEdges(loopEdges)]
+        face = Part.Face(surface, wires) if wires else surface.toShape()
+        face.validate()
+        # primitives have their own normal direction, flip says if opposite
+        if f.reversed != getattr(f.surface, "flip", False):
+            face.reverse()
+        return face
+
+    def primitive_report(self):
+        "How many NURBS were imported as exact primitives, empty when none seen"
+        if self.analytic is None or not self.candidates:
+            return ""
+        curves = sum(self.primitives[k] for k in ("Line", "Arc", "Circle", "Ellipse"))
+        surfaces = sum(self.primitives.values()) - curves
+        detail = "  ".join(f"{k} {n}" for k, n in sorted(self.primitives.items()))
+        return (
+            f"Primitives : {curves} of {self.candidates['curves']} curves and "
+            f"{surfaces} of {self.candidates['surfaces']} surfaces made exact"
+            + (f"  ( {detail} )" if detail else "")
+        )
+
+    def build_extrusion(self, doc, e):
+        "Part::Extrusion of a hidden profile object, a solid when capped"
+        wires = [self.wire_shape(p, as_wire=True) for p in e.profiles if p.edges]
+        if not wires:
+            logger.warning("Extrusion without profile edges, not imported")
+            return None
+        base = doc.addObject("Part::Feature", "Profile")
+        base.Shape = wires[0] if len(wires) == 1 else Part.Compound(wires)
+        base.Visibility = False
+        obj = doc.addObject("Part::Extrusion", "Extrusion")
+        obj.Base = base
+        obj.DirMode = "Custom"
+        obj.Dir = FreeCAD.Vector(*e.path)
+        obj.LengthFwd = 0  # the length of Dir
+        # the face maker puts inner profiles into the outer one as holes
+        obj.Solid = e.capped
+        self.recompute(obj)
+        return [base, obj]
+
+    def build_mesh(self, doc, m):
+        import Mesh
+
+        obj = doc.addObject("Mesh::Feature")
+        # FreeCAD only supports Triangles, quads were split on extraction
+        logger.debug("Mesh Facet Count : %d", len(m.facets))
+        if self.metrics is not None:
+            self.metrics.add(faces=len(m.facets))
+        fcMesh = Mesh.Mesh()
+        if len(m.facets) > 0:
+            fcMesh.addFacets((to_tuples(m.points), to_tuples(m.facets)))
+        obj.Mesh = fcMesh
+        return obj
+
+converters = ConverterRegistry()
+converters.register("Brep", File3dm.convert_brep)
+converters.register("LineCurve", File3dm.convert_line_curve)
+converters.register("NurbsCurve", File3dm.convert_nurbs_curve)
+converters.register("ArcCurve", File3dm.convert_arc_curve)
+converters.register("BezierCurve", File3dm.convert_bezier_curve)
+converters.register("PolylineCurve", File3dm.convert_polyline_curve)
+converters.register("PolyCurve", File3dm.convert_poly_curve)
+converters.register("Curve", File3dm.convert_curve)
+converters.register("Extrusion", File3dm.convert_extrusion)
+converters.register("InstanceReference", File3dm.convert_instance_reference)
+converters.register("Mesh", File3dm.convert_mesh)
+converters.register("NurbsSurface", File3dm.convert_nurbs_surface)
+converters.register("PointCloud", File3dm.convert_point_cloud)
+converters.register("Surface", File3dm.convert_surface)
+converters.register("SubD", File3dm.convert_subd)
+
+
+
+
+def loadFile(filename):
+    "File3dm set up from the import preferences : logging, profile and cache"
+    setup_logging()
+    metrics = ImportMetrics(getBool("TrackMemory")) if getBool("Profile") else None
+    cache = None
+    if getBool("UseCache"):
+        cache = ShapeCache(
+            getString("CacheDirectory") or None,
+            getInt("CacheSizeMB", 1024) << 20,
+            VERSION,
+        )
+    return File3dm(filename, metrics, cache=cache)
+
+
+def importWorkers(count):
+    # Geometry is extracted in worker processes when worth the start up
+    if count < getInt("ParallelThreshold", 2000):
+        return 1
+    return getInt("Workers", 1)
+
+
+def importFile(fi, doc, selection=None):
+    "Convert the objects of fi, or those in selection, into doc in one go"
+    count = len(fi.objects) if selection is None else len(selection)
+    workers = 1 if fi.proxies != "None" else importWorkers(count)
+    # Large imports are done with recomputes deferred to the end
+    threshold = getInt("DeferRecomputeThreshold", 500)
+    deferred = 0 <= threshold <= count
+    return fi.parse_objects(doc, deferred, workers, selection)
+
+
+def validateImport(fi, fixes=None, report=None):
+    """Check the shapes fi created and heal them with fixes ( default the
+    ValidateFixes setting ), see validate.py. Returns the report entries"""
+    from .validate import summary, validate_objects, write_report
+
+    objs = fi.created
+    if not objs:
+        return []
+    if fixes is None:
+        fixes = [f.strip() for f in getString("ValidateFixes").split(",") if f.strip()]
+    tolerance = getFloat("ValidateTolerance", 0.0) or fi.tolerance
+    workers = importWorkers(len(objs))
+    entries = fi.transaction(
+        objs[0].Document, True, "Validate 3DM",
+        validate_objects, objs, tolerance, fixes, workers, False,
+    )
+    FreeCAD.Console.PrintMessage(summary(entries) + "\n")
+    for entry in entries:
+        if entry["issues"]:
+            logger.info(
+                "%s ( %s ) : %s",
+                entry["label"],
+                entry["object"],
+                ", ".join(entry["issues"]),
+            )
+    report = report or getString("ValidationReport")
+    if report:
+        write_report(entries, report)
+    return entries
+
+
+def reportImport(fi):
+    "Print what the import found and measured to the Report view"
+    report = fi.primitive_report()
+    if report:
+        FreeCAD.Console.PrintMessage(report + "\n")
+    if fi.curve_hits:
+        FreeCAD.Console.PrintMessage(
+            "Curve cache : %d identical curves reused\n" % fi.curve_hits
+        )
+    cache = fi.cache
+    if cache is not None:
+        FreeCAD.Console.PrintMessage(
+            "Shape cache : {hits} hits {misses} misses {evictions} evicted\n".format(
+                **cache.stats()
+            )
+        )
+    metrics = fi.metrics
+    if metrics is not None:
+        metrics.report()
+        reportPath = getString("ProfileReport")
+        if reportPath:
+            metrics.write_json(reportPath)
+    if fi.proxy_count:
+        FreeCAD.Console.PrintMessage(
+            "%d proxies created, selecting one converts it\n" % fi.proxy_count
+        )
@@ -0,0 +1,238 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Helpers that pull rhino3dm geometry out into flat NumPy arrays.
+# Nothing in here imports FreeCAD so it can be used and timed on its own.
+
+import numpy as np
+
+# Knots closer than this in parameter space are treated as one knot
+KNOT_TOLERANCE = 1e-10
+
+
+def point_array(points):
+    # points : sequence of rhino3dm Point3f / Point3d
+    count = len(points)
+    flat = np.fromiter(
+        (c for p in points for c in (p.X, p.Y, p.Z)), dtype=np.float64, count=3 * count
+    )
+    return flat.reshape(count, 3)
+
+
+def mesh_arrays(r3mesh):
+    "Return (points, faces) arrays, faces are the raw 3dm quads (N x 4)"
+    vertices = r3mesh.Vertices
+    if hasattr(vertices, "ToPoint3fArray"):
+        points = point_array(vertices.ToPoint3fArray())
+    else:
+        points = point_array([vertices[i] for i in range(len(vertices))])
+    faceList = r3mesh.Faces
+    count = len(faceList)
+    faces = np.fromiter(
+        (i for f in range(count) for i in faceList[f]), dtype=np.int64, count=4 * count
+    )
+    return points, faces.reshape(count, 4)
+
+
+def triangulate(faces):
+    # 3dm files always have 4 vertex values, triangles repeat the third
+    # Quads (a, b, c, d) are split into (a, b, c) and (a, c, d)
+    quads = faces[:, 2] != faces[:, 3]
+    return np.concatenate((faces[:, :3], faces[quads][:, [0, 2, 3]]))
+
+
+def mesh_triangles(r3mesh):
+    "Return (points, triangles) arrays ready for a FreeCAD Mesh"
+    points, faces = mesh_arrays(r3mesh)
+    return points, triangulate(faces)
+
+
+def knot_list(knots):
+    # One binding call where rhino3dm has it
+    if hasattr(knots, "ToList"):
+        return knots.ToList()
+    return list(knots)
+
+
+def compress_knots(knots, tolerance=KNOT_TOLERANCE):
+    "Return (knots, mults) for a non decreasing knot vector in one pass"
+    # Knots within tolerance of the first knot of a run are merged into it
+    unique = []
+    mults = []
+    start = None
+    for k in knots:
+        if start is not None and k - start <= tolerance:
+            mults[-1] += 1
+        else:
+            start = k
+            unique.append(k)
+            mults.append(1)
+    return unique, mults
+
+
+def fc_knots(knots, tolerance=KNOT_TOLERANCE):
+    "Knots and multiplicities as FreeCAD wants them from a 3dm knot list"
+    knots, mults = compress_knots(knot_list(knots), tolerance)
+    # 3dm knot vectors omit the end knots FreeCAD expects
+    mults[0] += 1
+    mults[-1] += 1
+    return knots, mults
+
+
+def knot_problem(knots, mults, degree, poles, periodic=False):
+    "Why a B-spline knot vector is unusable, empty when it is fine"
+    if len(knots) != len(mults):
+        return "knot and multiplicity counts differ"
+    if any(b <= a for a, b in zip(knots, knots[1:])):
+        return "knots not increasing"
+    if any(m < 1 or m > degree for m in mults[1:-1]):
+        return "interior multiplicity outside 1 to degree"
+    if periodic:
+        return ""
+    if sum(mults) != poles + degree + 1:
+        return "multiplicities do not add up to poles + degree + 1"
+    return ""
+
+
+def curve_control_points(nc):
+    "(n, 4) array of homogeneous control points of a rhino3dm NurbsCurve"
+    points = nc.Points
+    count = len(points)
+    flat = np.fromiter(
+        (c for i in range(count) for p in (points[i],) for c in (p.X, p.Y, p.Z, p.W)),
+        dtype=np.float64,
+        count=4 * count,
+    )
+    return flat.reshape(count, 4)
+
+
+def surface_control_net(nu):
+    "(CountU, CountV, 4) array of homogeneous control points of a NurbsSurface"
+    points = nu.Points
+    countU, countV = points.CountU, points.CountV
+    flat = np.fromiter(
+        (
+            c
+            for u in range(countU)
+            for v in range(countV)
+            for p in (points[u, v],)
+            for c in (p.X, p.Y, p.Z, p.W)
+        ),
+        dtype=np.float64,
+        count=4 * countU * countV,
+    )
+    return flat.reshape(countU, countV, 4)
+
+
+def dehomogenize(net, rational=True):
+    "Split homogeneous points into (poles, weights), weights None if not rational"
+    if not rational:
+        return net[..., :3], None
+    weights = net[..., 3]
+    return net[..., :3] / weights[..., np.newaxis], weights
+
+
+def to_tuples(poles):
+    # FreeCAD takes tuples where it wants a Vector
+    if poles.ndim == 2:
+        return list(map(tuple, poles.tolist()))
+    return [list(map(tuple, row)) for row in poles.tolist()]
+
+
+# Corners of a unit box and its 12 triangles, outward facing
+BOX_CORNERS = np.array(
+    [(x, y, z) for z in (0, 1) for y in (0, 1) for x in (0, 1)], dtype=np.float64
+)
+BOX_TRIANGLES = np.array(
+    [
+        (0, 2, 3), (0, 3, 1), (4, 5, 7), (4, 7, 6),
+        (0, 1, 5), (0, 5, 4), (2, 6, 7), (2, 7, 3),
+        (0, 4, 6), (0, 6, 2), (1, 3, 7), (1, 7, 5),
+    ],
+    dtype=np.int64,
+)
+
+
+def box_mesh(low, high):
+    "Return (points, triangles) arrays of the box from low to high corners"
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    return low + BOX_CORNERS * (high - low), BOX_TRIANGLES.copy()
+
+
+# Points read from a PointCloud at a time, bounds the Python objects alive
+POINT_CHUNK = 1000000
+
+
+def point_cloud_chunks(pc, chunk=POINT_CHUNK, stride=1):
+    "Yield (points, colors, normals) arrays for every stride'th point of a PointCloud"
+    # rhino3dm has no ranged getters, points are read one by one so only a
+    # chunk of them exist as Python objects at once. pc[i] carries the
+    # point's color and normal too, GetColors and GetNormals would build
+    # them for the whole cloud.
+    count = pc.Count
+    hasColors = pc.ContainsColors
+    hasNormals = pc.ContainsNormals
+    step = chunk * stride
+    for start in range(0, count, step):
+        indices = range(start, min(start + step, count), stride)
+        if not (hasColors or hasNormals):
+            points = np.fromiter(
+                (c for i in indices for p in (pc.PointAt(i),) for c in (p.X, p.Y, p.Z)),
+                dtype=np.float64,
+                count=3 * len(indices),
+            ).reshape(-1, 3)
+            yield points, None, None
+            continue
+        items = [pc[i] for i in indices]
+        colors = None
+        if hasColors:
+            colors = np.array([item.Color for item in items], dtype=np.uint8)[:, :3]
+        normals = None
+        if hasNormals:
+            normals = point_array([item.Normal for item in items]).astype(np.float32)
+        yield point_array([item.Location for item in items]), colors, normals
+
+
+class VoxelFilter:
+    "Keep the first point in each cell of a regular grid, fed chunk by chunk"
+
+    BITS = 21  # per axis, cell coordinates pack into one int64 key
+
+    def __init__(self, origin, size):
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.size = float(size)
+        self.seen = np.empty(0, dtype=np.int64)
+
+    def __call__(self, points):
+        "Return the indices of points falling in cells not seen before"
+        limit = (1 << self.BITS) - 1
+        cells = np.floor((points - self.origin) / self.size).astype(np.int64)
+        np.clip(cells, 0, limit, out=cells)
+        keys = (cells[:, 0] << (2 * self.BITS)) | (cells[:, 1] << self.BITS) | cells[:, 2]
+        keys, first = np.unique(keys, return_index=True)
+        new = ~np.isin(keys, self.seen, assume_unique=True)
+        self.seen = np.union1d(self.seen, keys[new])
+        return np.sort(first[new])
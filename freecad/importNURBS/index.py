@@ -0,0 +1,145 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Lightweight index of a 3dm file for selective imports
+#
+# Reads each object's layer, geometry type and bounding box without
+# converting anything, then picks the objects matching layer, type and box
+# filters so only those are converted ( File3dm.parse_objects selection ).
+
+import hashlib
+
+import numpy as np
+
+from .lazy import LazyModule
+
+r3 = LazyModule("rhino3dm")
+
+
+def fingerprint(geo):
+    "Hash of a geometry's 3dm encoding, changes whenever the geometry does"
+    # The encoding carries values rhino3dm caches on first use, a Brep's
+    # bounding box and solidity, so an object hashes differently once it
+    # was indexed or converted. Filling the caches first gives the same
+    # hash whatever was asked of the object before
+    geo.GetBoundingBox()
+    if hasattr(geo, "IsSolid"):
+        geo.IsSolid
+    return hashlib.sha1(geo.Encode()["data"].encode("ascii")).hexdigest()
+
+
+class FileIndex:
+    def __init__(self, f3dm, objects=None):
+        # f3dm : rhino3dm File3dm or a path to one
+        if isinstance(f3dm, str):
+            f3dm = r3.File3dm.Read(f3dm)
+        if objects is None:
+            objects = f3dm.Objects
+        layerTable = f3dm.Layers
+        self.layers = [layerTable[i].FullPath for i in range(len(layerTable))]
+        count = len(objects)
+        self.ids = []
+        self.types = []
+        self.layer = np.empty(count, dtype=np.int64)
+        self.definition = np.zeros(count, dtype=bool)
+        # min x y z, max x y z, NaN where the box is not valid
+        self.boxes = np.full((count, 6), np.nan)
+        for i, rhobj in enumerate(objects):
+            attributes = rhobj.Attributes
+            geo = rhobj.Geometry
+            self.ids.append(str(attributes.Id))
+            self.types.append(type(geo).__name__)
+            self.layer[i] = attributes.LayerIndex
+            self.definition[i] = attributes.IsInstanceDefinitionObject
+            bb = geo.GetBoundingBox()
+            if bb.IsValid:
+                self.boxes[i] = (bb.Min.X, bb.Min.Y, bb.Min.Z, bb.Max.X, bb.Max.Y, bb.Max.Z)
+        self.types = np.array(self.types, dtype=object)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def type_names(self):
+        return sorted(set(self.types[~self.definition]))
+
+    def counts(self):
+        "Objects per layer name and per type name, block members excluded"
+        top = ~self.definition
+        layers = {}
+        for i in self.layer[top]:
+            name = self.layer_name(i)
+            layers[name] = layers.get(name, 0) + 1
+        types = {}
+        for t in self.types[top]:
+            types[t] = types.get(t, 0) + 1
+        return layers, types
+
+    def type_counts(self, selection=None):
+        "Objects per type name, of selection when given"
+        if selection is None:
+            return self.counts()[1]
+        types = {}
+        for t in self.types[list(selection)]:
+            types[t] = types.get(t, 0) + 1
+        return types
+
+    def layer_name(self, i):
+        return self.layers[i] if 0 <= i < len(self.layers) else ""
+
+    def select(self, layers=None, types=None, box=None, inside=False):
+        """Indices of objects on any of layers ( names or indices ), of any of
+        types ( class names ) and meeting box ( xmin, ymin, zmin, xmax, ymax,
+        zmax ), intersecting it or wholly inside it. None skips a filter."""
+        mask = ~self.definition
+        if layers is not None:
+            wanted = [
+                l if isinstance(l, int) else self.layers.index(l)
+                for l in layers
+                if isinstance(l, int) or l in self.layers
+            ]
+            mask &= np.isin(self.layer, wanted)
+        if types is not None:
+            mask &= np.isin(self.types, list(types))
+        if box is not None:
+            low = np.asarray(box[:3], dtype=np.float64)
+            high = np.asarray(box[3:], dtype=np.float64)
+            boxes = self.boxes
+            # objects without a valid box never meet a spatial filter
+            with np.errstate(invalid="ignore"):
+                if inside:
+                    mask &= np.all(boxes[:, :3] >= low, axis=1)
+                    mask &= np.all(boxes[:, 3:] <= high, axis=1)
+                else:
+                    mask &= np.all(boxes[:, :3] <= high, axis=1)
+                    mask &= np.all(boxes[:, 3:] >= low, axis=1)
+        return np.flatnonzero(mask).tolist()
+
+    def extent(self, indices=None):
+        "Bounding box of the indexed objects, or of indices, None if empty"
+        boxes = self.boxes if indices is None else self.boxes[indices]
+        boxes = boxes[~np.isnan(boxes[:, 0])]
+        if not len(boxes):
+            return None
+        return tuple(boxes[:, :3].min(axis=0).tolist() + boxes[:, 3:].max(axis=0).tolist())
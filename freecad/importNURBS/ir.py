@@ -0,0 +1,446 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Neutral intermediate representation of 3dm geometry
+#
+# Conversion is split in two : extraction reads rhino3dm objects into
+# compact records of plain numbers and NumPy arrays ( degree, knots and
+# multiplicities, dehomogenized poles and weights, mesh index buffers ),
+# building turns records into Part / Mesh objects and needs FreeCAD.
+#
+# Nothing here imports FreeCAD, records pickle so extraction can run in
+# worker processes ( extract_parallel ) and can be saved with dump / load.
+#
+# analytic arguments are a geometric tolerance : curves and surfaces that
+# are lines, arcs, planes, cylinders, cones or spheres within it become
+# primitive records ( primitives.py ) instead of NURBS. None disables this.
+
+import hashlib, pickle
+
+import numpy as np
+
+from .index import fingerprint
+from .primitives import recognize_curve, recognize_surface, xyz, LineIR
+from .geometry import (
+    curve_control_points,
+    dehomogenize,
+    fc_knots,
+    mesh_triangles,
+    surface_control_net,
+    KNOT_TOLERANCE,
+)
+from .lazy import LazyModule
+
+r3 = LazyModule("rhino3dm")
+
+
+class CurveIR:
+    __slots__ = ("degree", "knots", "mults", "poles", "weights")
+
+    def __init__(self, degree, knots, mults, poles, weights=None):
+        self.degree = degree
+        self.knots = knots
+        self.mults = mults
+        self.poles = poles  # (n, 3)
+        self.weights = weights  # (n,) or None when not rational
+
+    @property
+    def periodic(self):
+        return self.mults[0] < self.degree + 1
+
+
+class SurfaceIR:
+    __slots__ = ("udegree", "vdegree", "uknots", "umults", "vknots", "vmults",
+                 "poles", "weights")
+
+    def __init__(self, udegree, vdegree, uknots, umults, vknots, vmults, poles,
+                 weights=None):
+        self.udegree = udegree
+        self.vdegree = vdegree
+        self.uknots = uknots
+        self.umults = umults
+        self.vknots = vknots
+        self.vmults = vmults
+        self.poles = poles  # (CountU, CountV, 3)
+        self.weights = weights  # (CountU, CountV) or None
+
+
+class MeshIR:
+    __slots__ = ("points", "facets")
+
+    def __init__(self, points, facets):
+        self.points = points  # (n, 3) float
+        self.facets = facets  # (m, 3) int triangles
+
+
+class CompoundIR:
+    __slots__ = ("parts",)
+
+    def __init__(self, parts):
+        self.parts = parts
+
+
+class FaceIR:
+    # loops : outer loop first, each a list of (edge index, reversed) trims
+    __slots__ = ("surface", "reversed", "loops")
+
+    def __init__(self, surface, reversed, loops):
+        self.surface = surface
+        self.reversed = reversed
+        self.loops = loops
+
+
+class BrepIR:
+    # Edges are extracted once and referenced by index from the face loops
+    __slots__ = ("faces", "edges", "solid")
+
+    def __init__(self, faces, edges, solid=False):
+        self.faces = faces
+        self.edges = edges
+        self.solid = solid
+
+
+class WireIR:
+    # curve records of consecutive segments, see wire_ir
+    __slots__ = ("edges",)
+
+    def __init__(self, edges):
+        self.edges = edges
+
+
+class ExtrusionIR:
+    # profiles : WireIR of the outer profile first then the holes, at the
+    # path start. path : PathStart to PathEnd
+    __slots__ = ("profiles", "path", "capped")
+
+    def __init__(self, profiles, path, capped):
+        self.profiles = profiles
+        self.path = path
+        self.capped = capped
+
+
+class ObjectIR:
+    # One File3dm object. geometry is None for types with no extractor,
+    # those are converted from the rhino3dm object in the main process.
+    __slots__ = ("index", "id", "type_name", "layer", "definition", "geometry",
+                 "fingerprint")
+
+    def __init__(self, index, id, type_name, layer=-1, definition=False):
+        self.index = index
+        self.id = id
+        self.type_name = type_name
+        self.layer = layer
+        self.definition = definition
+        self.geometry = None
+        self.fingerprint = None
+
+
+def curve_ir(curve, tolerance=KNOT_TOLERANCE, analytic=None):
+    if analytic:
+        primitive = recognize_curve(curve, analytic)
+        if primitive is not None:
+            return primitive
+    nc = curve.ToNurbsCurve()
+    poles, weights = dehomogenize(curve_control_points(nc), nc.IsRational)
+    knots, mults = fc_knots(nc.Knots, tolerance)
+    return CurveIR(nc.Degree, knots, mults, poles, weights)
+
+
+def surface_ir(surface, tolerance=KNOT_TOLERANCE, analytic=None, bounded=False):
+    # bounded : a recognized primitive keeps the NURBS too, its edges bound
+    # the primitive when there are no trimming loops
+    if analytic:
+        primitive = recognize_surface(surface, analytic)
+        if primitive is not None:
+            if bounded:
+                primitive.nurbs = surface_ir(surface, tolerance)
+            return primitive
+    nu = surface if isinstance(surface, r3.NurbsSurface) else surface.ToNurbsSurface()
+    poles, weights = dehomogenize(surface_control_net(nu), nu.IsRational)
+    uknots, umults = fc_knots(nu.KnotsU, tolerance)
+    vknots, vmults = fc_knots(nu.KnotsV, tolerance)
+    return SurfaceIR(
+        nu.Degree(0), nu.Degree(1), uknots, umults, vknots, vmults, poles, weights
+    )
+
+
+def mesh_ir(mesh):
+    return MeshIR(*mesh_triangles(mesh))
+
+
+def render_mesh_ir(geo):
+    """MeshIR of the render meshes Rhino saved with a Brep or Extrusion,
+    None when the file has none for it"""
+    if isinstance(geo, r3.Brep):
+        meshes = [face.GetMesh(r3.MeshType.Any) for face in geo.Faces]
+    elif isinstance(geo, r3.Extrusion):
+        meshes = [geo.GetMesh(r3.MeshType.Any)]
+    else:
+        return None
+    if not meshes or any(m is None for m in meshes):
+        return None
+    points = []
+    facets = []
+    offset = 0
+    for m in meshes:
+        p, f = mesh_triangles(m)
+        points.append(p)
+        facets.append(f + offset)
+        offset += len(p)
+    return MeshIR(np.concatenate(points), np.concatenate(facets))
+
+
+def face_ir(face, tolerance=KNOT_TOLERANCE, analytic=None):
+    loops = []
+    for loop in face.Loops:
+        trims = [(t.EdgeIndex, t.IsReversed) for t in loop.Trims]
+        # singular trims ( EdgeIndex -1 ) collapse to a point, no edge
+        trims = [t for t in trims if t[0] >= 0]
+        if loop.LoopType == r3.BrepLoopType.Outer:
+            loops.insert(0, trims)
+        else:
+            loops.append(trims)
+    return FaceIR(
+        surface_ir(face.UnderlyingSurface(), tolerance, analytic),
+        face.OrientationIsReversed,
+        loops,
+    )
+
+
+def face_range_ir(brep, start, stop, tolerance=KNOT_TOLERANCE, analytic=None):
+    faces = brep.Faces
+    return [face_ir(faces[i], tolerance, analytic) for i in range(start, stop)]
+
+
+def edges_ir(brep, tolerance=KNOT_TOLERANCE, analytic=None):
+    edges = brep.Edges
+    return [curve_ir(edges[i], tolerance, analytic) for i in range(len(edges))]
+
+
+def brep_ir(brep, tolerance=KNOT_TOLERANCE, analytic=None, faces=None):
+    "faces : FaceIR list when already extracted, see extract_faces_parallel"
+    if faces is None:
+        faces = face_range_ir(brep, 0, len(brep.Faces), tolerance, analytic)
+    return BrepIR(faces, edges_ir(brep, tolerance, analytic), brep.IsSolid)
+
+
+def curve_key(c):
+    "Hash of a curve record, equal for identical curves"
+    h = hashlib.sha1(type(c).__name__.encode())
+    for slot in c.__slots__:
+        value = getattr(c, slot)
+        if isinstance(value, np.ndarray):
+            h.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+        else:
+            h.update(repr(value).encode())
+    return h.digest()
+
+
+def segments_ir(curve, tolerance=KNOT_TOLERANCE, analytic=None):
+    "Curve records of curve's segments, nested PolyCurves flattened"
+    if isinstance(curve, r3.PolyCurve):
+        edges = []
+        for i in range(curve.SegmentCount):
+            edges += segments_ir(curve.SegmentCurve(i), tolerance, analytic)
+        return edges
+    if isinstance(curve, r3.LineCurve):
+        return [LineIR(xyz(curve.PointAtStart), xyz(curve.PointAtEnd))]
+    polyline = curve.TryGetPolyline()
+    if polyline is not None:
+        points = [xyz(polyline[i]) for i in range(polyline.Count)]
+        return [LineIR(a, b) for a, b in zip(points, points[1:]) if a != b]
+    return [curve_ir(curve, tolerance, analytic)]
+
+
+def wire_ir(curve, tolerance=KNOT_TOLERANCE, analytic=None):
+    """WireIR of a curve converted segment by segment : PolyCurve segments
+    natively, lines and polylines as exact line segments, only the rest
+    through their NURBS form"""
+    return WireIR(segments_ir(curve, tolerance, analytic))
+
+
+def extrusion_ir(geo, tolerance=KNOT_TOLERANCE, analytic=None):
+    """ExtrusionIR of a straight extrusion, mitered ends are not a sweep of
+    one profile so those extrusions are extracted as a BrepIR"""
+    if geo.IsMiteredAtStart or geo.IsMiteredAtEnd:
+        return brep_ir(geo.ToBrep(False), tolerance, analytic)
+    profiles = [
+        wire_ir(geo.Profile3d(i, 0.0), tolerance, analytic)
+        for i in range(geo.ProfileCount)
+    ]
+    if not any(p.edges for p in profiles):
+        # degenerate profiles, segments_ir drops zero length segments
+        return brep_ir(geo.ToBrep(False), tolerance, analytic)
+    start, end = xyz(geo.PathStart), xyz(geo.PathEnd)
+    path = tuple(e - s for s, e in zip(start, end))
+    return ExtrusionIR(profiles, path, geo.IsCappedAtBottom and geo.IsCappedAtTop)
+
+
+# Geometry class name -> extractor(geo, tolerance, analytic)
+EXTRACTORS = {
+    "NurbsCurve": curve_ir,
+    "PolyCurve": wire_ir,
+    "NurbsSurface": lambda geo, tolerance, analytic: surface_ir(
+        geo, tolerance, analytic, bounded=True
+    ),
+    "Mesh": lambda geo, tolerance, analytic: mesh_ir(geo),
+    "Brep": brep_ir,
+    "Extrusion": extrusion_ir,
+}
+
+
+def extract_object(
+    index, rhobj, tolerance=KNOT_TOLERANCE, analytic=None, fingerprints=False
+):
+    # fingerprints : also hash the geometry, only incremental updates need it
+    attributes = rhobj.Attributes
+    geo = rhobj.Geometry
+    rec = ObjectIR(
+        index,
+        str(attributes.Id),
+        type(geo).__name__,
+        attributes.LayerIndex,
+        attributes.IsInstanceDefinitionObject,
+    )
+    extractor = EXTRACTORS.get(rec.type_name)
+    if extractor is not None and not rec.definition:
+        if fingerprints:
+            # before the extractor reads the geometry, see fingerprint
+            rec.fingerprint = fingerprint(geo)
+        rec.geometry = extractor(geo, tolerance, analytic)
+    return rec
+
+
+def extract_file(path, tolerance=KNOT_TOLERANCE, analytic=None, fingerprints=False):
+    objects = r3.File3dm.Read(path).Objects
+    return [
+        extract_object(i, o, tolerance, analytic, fingerprints)
+        for i, o in enumerate(objects)
+    ]
+
+
+def dump(records, path):
+    with open(path, "wb") as fp:
+        pickle.dump(records, fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(path):
+    with open(path, "rb") as fp:
+        return pickle.load(fp)
+
+
+##########################################
+#
+# Worker processes
+#
+###########################################
+_objects = None
+
+
+def _init_worker(path):
+    # Each worker reads the file once, tasks are index ranges into it
+    global _objects
+    _objects = r3.File3dm.Read(path).Objects
+
+
+def _extract_indices(indices, tolerance, analytic, fingerprints):
+    objects = _objects
+    return [
+        extract_object(i, objects[i], tolerance, analytic, fingerprints)
+        for i in indices
+    ]
+
+
+_brep = (None, None)
+
+
+def _extract_faces(id, start, stop, tolerance, analytic):
+    global _brep
+    if _brep[0] != id:
+        _brep = (id, _objects.FindId(id).Geometry)
+    return face_range_ir(_brep[1], start, stop, tolerance, analytic)
+
+
+def extract_parallel(
+    path,
+    indices,
+    workers,
+    tolerance=KNOT_TOLERANCE,
+    analytic=None,
+    fingerprints=False,
+    chunk=None,
+):
+    "Yield ObjectIR records for the objects at indices in order, extracted in a pool"
+    from .parallel import process_pool, worker_count
+
+    indices = list(indices)
+    count = len(indices)
+    n = worker_count(workers)
+    chunk = chunk or max(1, min(500, count // (n * 4) or 1))
+    with process_pool(n, _init_worker, (path,)) as pool:
+        futures = [
+            pool.submit(
+                _extract_indices,
+                indices[start : start + chunk],
+                tolerance,
+                analytic,
+                fingerprints,
+            )
+            for start in range(0, count, chunk)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # stopped early ( cancelled import ), drop chunks not started
+            for future in futures:
+                future.cancel()
+
+
+def face_extraction_pool(path, workers):
+    "Process pool for extract_faces_parallel, its workers read path once"
+    from .parallel import process_pool
+
+    return process_pool(workers, _init_worker, (path,))
+
+
+def extract_faces_parallel(
+    pool, workers, id, count, tolerance=KNOT_TOLERANCE, analytic=None, chunk=None
+):
+    """FaceIR records for the count faces of Brep object id, extracted in a
+    face_extraction_pool of workers processes"""
+    chunk = chunk or max(1, min(200, count // (workers * 4) or 1))
+    futures = [
+        pool.submit(
+            _extract_faces,
+            id,
+            start,
+            min(start + chunk, count),
+            tolerance,
+            analytic,
+        )
+        for start in range(0, count, chunk)
+    ]
+    return [face for future in futures for face in future.result()]
@@ -0,0 +1,170 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Logging and import metrics
+#
+# All importer diagnostics go through the "importNURBS" logger, which is
+# sent to the FreeCAD Report view. Messages below the configured level are
+# dropped before they are formatted, expensive ones are also guarded with
+# logger.isEnabledFor so they cost nothing when off.
+#
+# ImportMetrics collects per rhino3dm geometry class counters : object
+# count, conversion wall time, control points, mesh faces and peak Python
+# heap ( tracemalloc, so OCC memory is not included ).
+
+import json, logging, time, tracemalloc
+
+import FreeCAD
+
+logger = logging.getLogger("importNURBS")
+
+LEVELS = {
+    "Debug": logging.DEBUG,
+    "Info": logging.INFO,
+    "Warning": logging.WARNING,
+    "Error": logging.ERROR,
+}
+
+
+class ConsoleHandler(logging.Handler):
+    # Send log records to the FreeCAD Report view / console
+    def emit(self, record):
+        try:
+            msg = self.format(record) + "\n"
+        except Exception:
+            self.handleError(record)
+            return
+        if record.levelno >= logging.ERROR:
+            FreeCAD.Console.PrintError(msg)
+        elif record.levelno >= logging.WARNING:
+            FreeCAD.Console.PrintWarning(msg)
+        elif record.levelno >= logging.INFO:
+            FreeCAD.Console.PrintMessage(msg)
+        else:
+            FreeCAD.Console.PrintLog(msg)
+
+
+def setup_logging(level=None):
+    "Set the importer log level, default from the LogLevel preference"
+    from .preferences import getString
+
+    if level is None:
+        level = getString("LogLevel", "Warning")
+    if isinstance(level, str):
+        level = LEVELS.get(level.capitalize(), logging.WARNING)
+    logger.setLevel(level)
+    if not any(isinstance(h, ConsoleHandler) for h in logger.handlers):
+        logger.addHandler(ConsoleHandler())
+        logger.propagate = False
+    return logger
+
+
+class TypeStats:
+    __slots__ = ("count", "seconds", "control_points", "faces", "peak_memory")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.control_points = 0
+        self.faces = 0
+        self.peak_memory = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ImportMetrics:
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.types = {}
+        self.current = None
+        self.started = time.perf_counter()
+        self.finished = None
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stats(self, name):
+        stats = self.types.get(name)
+        if stats is None:
+            stats = self.types[name] = TypeStats()
+        return stats
+
+    def measure(self, name, func, *args):
+        "Call func(*args) and record it against geometry class name"
+        stats = self.current = self.stats(name)
+        if self.track_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.count += 1
+            if self.track_memory:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                stats.peak_memory = max(stats.peak_memory, peak)
+            self.current = None
+
+    def add(self, control_points=0, faces=0):
+        # Counters for the object currently being measured
+        if self.current is not None:
+            self.current.control_points += control_points
+            self.current.faces += faces
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        if self.track_memory:
+            tracemalloc.stop()
+
+    def as_dict(self):
+        end = self.finished or time.perf_counter()
+        return {
+            "total_seconds": end - self.started,
+            "objects": sum(s.count for s in self.types.values()),
+            "types": {name: s.as_dict() for name, s in sorted(self.types.items())},
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as fp:
+            json.dump(self.as_dict(), fp, indent=2)
+
+    def summary_table(self):
+        rows = [
+            f"{'Geometry':<20}{'Count':>8}{'Seconds':>10}{'ms/obj':>9}"
+            f"{'CVs':>10}{'Faces':>10}{'Peak KB':>10}"
+        ]
+        for name, s in sorted(self.types.items(), key=lambda i: -i[1].seconds):
+            rows.append(
+                f"{name:<20}{s.count:>8}{s.seconds:>10.3f}"
+                f"{1000.0 * s.seconds / max(s.count, 1):>9.2f}"
+                f"{s.control_points:>10}{s.faces:>10}{s.peak_memory // 1024:>10}"
+            )
+        data = self.as_dict()
+        rows.append(f"{data['objects']} objects in {data['total_seconds']:.3f}s")
+        return "\n".join(rows) + "\n"
+
+    def report(self):
+        FreeCAD.Console.PrintMessage("3DM import metrics\n" + self.summary_table())
@@ -0,0 +1,62 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Process pools usable from inside FreeCAD
+#
+# Workers are always spawned, never forked, as forking a running GUI is
+# unsafe. In the FreeCAD GUI sys.executable is FreeCAD itself, so workers
+# are started with the Python interpreter bundled alongside it.
+
+import multiprocessing, os, shutil, sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+def python_executable():
+    exe = sys.executable
+    if os.path.basename(exe).lower().startswith("python"):
+        return exe
+    names = ("python3", "python", "python.exe")
+    for folder in (os.path.dirname(exe), os.path.join(sys.prefix, "bin"), sys.prefix):
+        for name in names:
+            candidate = os.path.join(folder, name)
+            if os.path.isfile(candidate):
+                return candidate
+    return shutil.which("python3") or shutil.which("python") or exe
+
+
+def worker_count(workers):
+    # 0 or less means one per core
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def process_pool(workers, initializer=None, initargs=()):
+    ctx = multiprocessing.get_context("spawn")
+    ctx.set_executable(python_executable())
+    return ProcessPoolExecutor(
+        max_workers=worker_count(workers),
+        mp_context=ctx,
+        initializer=initializer,
+        initargs=initargs,
+    )
@@ -0,0 +1,51 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Importer settings, kept with FreeCAD's other user parameters under
+# Tools | Edit parameters | BaseApp/Preferences/Mod/ImportNURBS
+
+import FreeCAD
+
+PARAM_PATH = "User parameter:BaseApp/Preferences/Mod/ImportNURBS"
+
+
+def params():
+    return FreeCAD.ParamGet(PARAM_PATH)
+
+
+def getBool(name, default=False):
+    return params().GetBool(name, default)
+
+
+def getInt(name, default=0):
+    return params().GetInt(name, default)
+
+
+def getFloat(name, default=0.0):
+    return params().GetFloat(name, default)
+
+
+def getString(name, default=""):
+    return params().GetString(name, default)
@@ -0,0 +1,290 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Recognition of analytic primitives in NURBS geometry
+#
+# rhino3dm's IsLinear / TryGetArc on curves and IsPlanar / IsCylinder /
+# IsCone / IsSphere on surfaces decide, within a tolerance, whether a NURBS
+# is really a line, arc, plane, cylinder, cone or sphere. The exact form is
+# then recovered from the geometry : iso curve circles for cylinders and
+# cones, a least squares fit of points and normals for spheres.
+#
+# rhino3dm's TryGetEllipse never finds one and its Ellipse has no members,
+# so closed ellipses are found by fitting a conic to points on the curve.
+# Elliptical arcs stay NURBS.
+#
+# Records here are ir geometry, built into exact Part geometry by File3dm.
+# flip marks surfaces whose NURBS normal is opposite to the normal of the
+# Part primitive ( outward for cylinders, cones and spheres ).
+
+import numpy as np
+
+
+def xyz(p):
+    return (p.X, p.Y, p.Z)
+
+
+def unit(v):
+    v = np.asarray(v, dtype=np.float64)
+    n = np.linalg.norm(v)
+    return tuple((v / n).tolist()) if n > 0 else None
+
+
+class LineIR:
+    __slots__ = ("start", "end")
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+
+class ArcIR:
+    # angle radians counterclockwise about normal from xaxis, 2 pi for a circle
+    __slots__ = ("center", "normal", "xaxis", "radius", "angle")
+
+    def __init__(self, center, normal, xaxis, radius, angle):
+        self.center = center
+        self.normal = normal
+        self.xaxis = xaxis
+        self.radius = radius
+        self.angle = angle
+
+    @property
+    def closed(self):
+        return abs(self.angle - 2 * np.pi) < 1e-9
+
+
+class EllipseIR:
+    # closed, counterclockwise about major x minor, parameter start at the
+    # curve start
+    __slots__ = ("center", "major", "minor", "major_radius", "minor_radius", "start")
+
+    def __init__(self, center, major, minor, major_radius, minor_radius, start):
+        self.center = center
+        self.major = major
+        self.minor = minor
+        self.major_radius = major_radius
+        self.minor_radius = minor_radius
+        self.start = start
+
+
+class PlaneIR:
+    __slots__ = ("origin", "normal", "flip", "nurbs")
+
+    def __init__(self, origin, normal):
+        self.origin = origin
+        self.normal = normal
+        self.flip = False
+        # SurfaceIR of the untrimmed surface, bounds a standalone surface
+        self.nurbs = None
+
+
+class CylinderIR:
+    __slots__ = ("center", "axis", "radius", "flip", "nurbs")
+
+    def __init__(self, center, axis, radius, flip=False):
+        self.center = center
+        self.axis = axis
+        self.radius = radius
+        self.flip = flip
+        self.nurbs = None
+
+
+class ConeIR:
+    # circles of radius1 at point1 and radius2 at point2 on the axis
+    __slots__ = ("point1", "point2", "radius1", "radius2", "flip", "nurbs")
+
+    def __init__(self, point1, point2, radius1, radius2, flip=False):
+        self.point1 = point1
+        self.point2 = point2
+        self.radius1 = radius1
+        self.radius2 = radius2
+        self.flip = flip
+        self.nurbs = None
+
+
+class SphereIR:
+    __slots__ = ("center", "radius", "flip", "nurbs")
+
+    def __init__(self, center, radius, flip=False):
+        self.center = center
+        self.radius = radius
+        self.flip = flip
+        self.nurbs = None
+
+
+PRIMITIVE_CURVES = (LineIR, ArcIR, EllipseIR)
+PRIMITIVE_SURFACES = (PlaneIR, CylinderIR, ConeIR, SphereIR)
+
+
+def recognize_curve(curve, tolerance):
+    "LineIR, ArcIR or EllipseIR when curve is one within tolerance, else None"
+    if not curve.IsClosed and curve.IsLinear(tolerance):
+        return LineIR(xyz(curve.PointAtStart), xyz(curve.PointAtEnd))
+    arc = curve.TryGetArc(tolerance)
+    if arc is None or not arc.IsValid:
+        return recognize_ellipse(curve, tolerance)
+    center = np.array(xyz(arc.Center))
+    # the arc follows the curve direction, it starts at the curve start
+    xaxis = unit(np.array(xyz(curve.PointAtStart)) - center)
+    normal = unit(xyz(arc.Plane.ZAxis))
+    if xaxis is None or normal is None:
+        return None
+    return ArcIR(tuple(center.tolist()), normal, xaxis, arc.Radius, arc.AngleRadians)
+
+
+def _conic(x, y):
+    # center and ( radius, direction ) pairs of the least squares conic
+    # through x, y, None unless it is an ellipse
+    design = np.column_stack([x * x, x * y, y * y, x, y, np.ones_like(x)])
+    a, b, c, d, e, f = np.linalg.svd(design)[2][-1]
+    if b * b - 4 * a * c >= 0:
+        return None
+    center = np.linalg.solve([[2 * a, b], [b, 2 * c]], [-d, -e])
+    value = f + (d * center[0] + e * center[1]) / 2
+    eigenvalues, directions = np.linalg.eigh([[a, b / 2], [b / 2, c]])
+    squares = -value / eigenvalues
+    if np.any(squares <= 0):
+        return None
+    return center, sorted(zip(np.sqrt(squares), directions.T), key=lambda r: -r[0])
+
+
+def recognize_ellipse(curve, tolerance, samples=32):
+    "EllipseIR when curve is a closed ellipse within tolerance, else None"
+    if not curve.IsClosed or getattr(curve, "Degree", 1) < 2:
+        return None
+    # the fit uses even samples, the check those and the ones in between
+    fractions = np.arange(2 * samples) / (2 * samples)
+    points = np.array([xyz(curve.PointAt(t)) for t in _parameters(curve.Domain, fractions)])
+    mean = points.mean(axis=0)
+    u, v, normal = np.linalg.svd(points - mean)[2]
+    if np.max(np.abs((points - mean) @ normal)) > tolerance:
+        return None
+    local = (points - mean) @ np.array([u, v]).T
+    scale = np.sqrt(np.mean(np.sum(local**2, axis=1)))
+    fit = _conic(*(local[::2] / scale).T)
+    if fit is None:
+        return None
+    center, ((a, major), (b, _)) = fit
+    a, b = a * scale, b * scale
+    if a - b < tolerance:
+        return None  # a circle, TryGetArc did not take it
+    offset = local - center * scale
+    # counterclockwise about the normal, as Part.Ellipse goes
+    following = np.roll(offset, -1, axis=0)
+    area = np.sum(offset[:, 0] * following[:, 1] - offset[:, 1] * following[:, 0])
+    minor = np.array([-major[1], major[0]]) * (1 if area > 0 else -1)
+    x = offset @ major / a
+    y = offset @ minor / b
+    r = np.hypot(x, y)
+    if np.max(np.linalg.norm(offset, axis=1) * np.abs(1 - 1 / r)) > tolerance:
+        return None
+    angles = np.unwrap(np.arctan2(y, x))
+    # once round, in the curve direction
+    if np.any(np.diff(angles) <= 0) or angles[-1] - angles[0] > 2 * np.pi:
+        return None
+    frame = np.array([u, v])
+    return EllipseIR(
+        tuple((mean + center * scale @ frame).tolist()),
+        unit(major @ frame),
+        unit(minor @ frame),
+        float(a),
+        float(b),
+        float(angles[0]),
+    )
+
+
+def _parameters(domain, fractions):
+    return [domain.T0 + f * (domain.T1 - domain.T0) for f in fractions]
+
+
+def _samples(surface, fractions=(0.25, 0.5, 0.75)):
+    "(points, normals) arrays on a grid inside the surface domain"
+    points = []
+    normals = []
+    for u in _parameters(surface.Domain(0), fractions):
+        for v in _parameters(surface.Domain(1), fractions):
+            points.append(xyz(surface.PointAt(u, v)))
+            normals.append(xyz(surface.NormalAt(u, v)))
+    return np.array(points), np.array(normals)
+
+
+def _iso_circles(surface, tolerance):
+    # Circles a quarter and three quarters along whichever direction has them
+    for direction in (0, 1):
+        params = _parameters(surface.Domain(1 - direction), (0.25, 0.75))
+        circles = [surface.IsoCurve(direction, t).TryGetCircle(tolerance) for t in params]
+        if all(c is not None for c in circles):
+            return circles
+    return None
+
+
+def _outward(points, normals, center, axis):
+    # True when the normals point away from the axis
+    offset = points - center
+    radial = offset - np.outer(offset @ axis, axis)
+    return float(np.sum(radial * normals)) >= 0.0
+
+
+def recognize_surface(surface, tolerance):
+    "PlaneIR, CylinderIR, ConeIR or SphereIR for surface within tolerance, else None"
+    if surface.IsPlanar(tolerance):
+        u = _parameters(surface.Domain(0), (0.5,))[0]
+        v = _parameters(surface.Domain(1), (0.5,))[0]
+        normal = unit(xyz(surface.NormalAt(u, v)))
+        if normal is None:
+            return None
+        return PlaneIR(xyz(surface.PointAt(u, v)), normal)
+    if surface.IsSphere(tolerance):
+        # points P = C + R N, solved for C and R
+        points, normals = _samples(surface)
+        count = len(points)
+        a = np.zeros((3 * count, 4))
+        a[:, :3] = np.tile(np.eye(3), (count, 1))
+        a[:, 3] = normals.reshape(-1)
+        solution = np.linalg.lstsq(a, points.reshape(-1), rcond=None)[0]
+        radius = solution[3]
+        if abs(radius) <= tolerance:
+            return None
+        return SphereIR(tuple(solution[:3].tolist()), abs(radius), radius < 0)
+    cylinder = surface.IsCylinder(tolerance)
+    if not cylinder and not surface.IsCone(tolerance):
+        return None
+    circles = _iso_circles(surface, tolerance)
+    if circles is None:
+        return None
+    c1, c2 = circles
+    p1 = np.array(xyz(c1.Center))
+    p2 = np.array(xyz(c2.Center))
+    axis = unit(p2 - p1) or unit(xyz(c1.Normal))
+    if axis is None:
+        return None
+    points, normals = _samples(surface)
+    flip = not _outward(points, normals, p1, np.array(axis))
+    if cylinder:
+        return CylinderIR(tuple(p1.tolist()), axis, c1.Radius, flip)
+    if abs(c1.Radius - c2.Radius) <= tolerance:
+        return None
+    return ConeIR(tuple(p1.tolist()), tuple(p2.tolist()), c1.Radius, c2.Radius, flip)
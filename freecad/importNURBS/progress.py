@@ -0,0 +1,205 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Progressive import in the GUI
+#
+# ImportJob converts objects a time slice at a time from a QTimer, so the
+# event loop runs between slices : the window repaints, converted objects
+# appear as they are added and the Cancel button is live. Cancelling stops
+# between objects, what was converted so far stays as a normal import.
+
+import time
+
+import FreeCAD
+from PySide import QtCore, QtGui
+
+from .metrics import logger
+
+# Seconds of conversion between returns to the event loop
+SLICE = 0.1
+
+# Running jobs, keeps them alive until they finish
+jobs = set()
+
+
+def formatSeconds(seconds):
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class ProgressTracker:
+    "Objects done against totals per geometry type, with time estimates"
+
+    def __init__(self, totals):
+        self.totals = dict(totals)
+        self.total = sum(self.totals.values())
+        self.done = {}
+        self.seconds = {}
+
+    @property
+    def count(self):
+        return sum(self.done.values())
+
+    def add(self, name, seconds):
+        if name not in self.totals:
+            # not a file object, e.g. the layer compounds made at the end
+            return
+        self.done[name] = self.done.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def eta(self, name):
+        "Seconds left for a type, from its own rate or the overall one"
+        remaining = self.totals.get(name, 0) - self.done.get(name, 0)
+        if remaining <= 0:
+            return 0.0
+        if self.done.get(name):
+            return remaining * self.seconds[name] / self.done[name]
+        count = self.count
+        if not count:
+            return None
+        return remaining * sum(self.seconds.values()) / count
+
+    def eta_total(self):
+        etas = [self.eta(name) for name in self.totals]
+        if None in etas:
+            return None
+        return sum(etas)
+
+    def text(self, types=3):
+        etas = {n: self.eta(n) for n in self.totals}
+        # longest first, types with no estimate yet before all others
+        left = sorted(
+            (n for n, s in etas.items() if s != 0.0),
+            key=lambda n: float("inf") if etas[n] is None else etas[n],
+            reverse=True,
+        )
+        detail = "  ".join(f"{n} {formatSeconds(etas[n])}" for n in left[:types])
+        text = f"{self.count} / {self.total} objects  ETA {formatSeconds(self.eta_total())}"
+        return f"{text}  ( {detail} )" if detail else text
+
+
+class ProgressWidget(QtGui.QWidget):
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        layout = QtGui.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.label = QtGui.QLabel("Import 3DM")
+        self.bar = QtGui.QProgressBar()
+        self.bar.setRange(0, max(1, job.tracker.total))
+        self.cancel = QtGui.QPushButton("Cancel")
+        self.cancel.clicked.connect(job.cancel)
+        layout.addWidget(self.label)
+        layout.addWidget(self.bar)
+        layout.addWidget(self.cancel)
+
+    def update(self, tracker):
+        self.bar.setValue(tracker.count)
+        self.label.setText(tracker.text())
+
+
+class ImportJob:
+    def __init__(self, fi, doc, totals, workers=1, selection=None, done=None):
+        # totals : objects to convert per geometry type, FileIndex.type_counts
+        # done( fi ) : called when the job has finished or was cancelled
+        self.fi = fi
+        self.doc = doc
+        self.workers = workers
+        self.selection = selection
+        self.done = done
+        self.tracker = ProgressTracker(totals)
+        self.objects = None
+        self.part = None
+        self.cancelled = False
+        self.widget = None
+
+    def start(self):
+        import FreeCADGui
+
+        self.fi.deferred = True
+        self.doc.openTransaction("Import 3DM")
+        self.part = self.fi.import_part(self.doc)
+        self.objects = self.fi.iter_objects(self.doc, self.workers, self.selection)
+        self.widget = ProgressWidget(self)
+        FreeCADGui.getMainWindow().statusBar().addPermanentWidget(self.widget)
+        jobs.add(self)
+        QtCore.QTimer.singleShot(0, self.step)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def step(self):
+        finished = self.cancelled
+        objs = []
+        start = time.perf_counter()
+        try:
+            # at least one object per slice
+            while not finished:
+                before = time.perf_counter()
+                name, new = next(self.objects)
+                self.tracker.add(name, time.perf_counter() - before)
+                objs += new
+                if time.perf_counter() - start >= SLICE:
+                    break
+        except StopIteration:
+            finished = True
+        except Exception:
+            logger.exception("3DM import stopped")
+            self.cancelled = finished = True
+        if objs:
+            self.part.addObjects(objs)
+            self.doc.recompute()
+        self.widget.update(self.tracker)
+        if finished:
+            self.finish()
+        else:
+            QtCore.QTimer.singleShot(0, self.step)
+
+    def finish(self):
+        import FreeCADGui
+
+        self.objects.close()
+        # curves collected for layer compounds before a cancel stay too
+        objs = self.fi.layer_compounds(self.doc)
+        if objs:
+            self.part.addObjects(objs)
+        self.fi.deferred = False
+        self.doc.recompute()
+        self.doc.commitTransaction()
+        self.fi.finish()
+        FreeCADGui.getMainWindow().statusBar().removeWidget(self.widget)
+        self.widget.deleteLater()
+        jobs.discard(self)
+        if self.cancelled:
+            FreeCAD.Console.PrintWarning(
+                "3DM import cancelled, %d of %d objects imported\n"
+                % (self.tracker.count, self.tracker.total)
+            )
+        if self.done is not None:
+            self.done(self.fi)
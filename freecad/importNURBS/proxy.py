@@ -0,0 +1,78 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Expanding proxies on selection
+#
+# Proxy imports ( ProxyImport ) leave placeholder meshes in the document.
+# A selection observer replaces each one by the exact conversion of its
+# 3dm object as soon as it is picked, in the 3D view or the tree.
+
+import FreeCAD
+import FreeCADGui
+from PySide import QtCore
+
+from .core import expand_proxies, isProxy
+from .metrics import logger
+
+observer = None
+
+
+class ProxyObserver:
+    def __init__(self):
+        self.pending = []
+
+    def addSelection(self, docName, objName, sub, pnt):
+        doc = FreeCAD.getDocument(docName)
+        obj = doc.getObject(objName) if doc is not None else None
+        if obj is None or not isProxy(obj):
+            return
+        # not while the selection is being changed, from the event loop
+        if not self.pending:
+            QtCore.QTimer.singleShot(0, self.expand)
+        self.pending.append((docName, objName))
+
+    def expand(self):
+        pending, self.pending = self.pending, []
+        objs = []
+        for docName, objName in pending:
+            obj = FreeCAD.getDocument(docName).getObject(objName)
+            if obj is not None:
+                objs.append(obj)
+        try:
+            new = expand_proxies(objs)
+        except Exception as e:
+            logger.error("Expanding proxies failed : %s", e)
+            return
+        FreeCADGui.Selection.clearSelection()
+        for obj in new:
+            FreeCADGui.Selection.addSelection(obj)
+
+
+def watchSelection():
+    "Expand proxies when selected, installed once per session"
+    global observer
+    if observer is None:
+        observer = ProxyObserver()
+        FreeCADGui.Selection.addObserver(observer)
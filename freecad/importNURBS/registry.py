@@ -0,0 +1,85 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Converter registry
+#
+# Maps rhino3dm geometry classes to converter functions
+#     handler(importer, doc, geo) -> document object, Part shape, list or None
+# Handlers are looked up along the geometry type's MRO, so a handler for
+# Curve also picks up curve types with no handler of their own, and the
+# result is cached per concrete type.
+#
+# Types are registered by class or class name, names allow registering
+# without importing rhino3dm. Plugins can add or override handlers e.g.
+#
+#     from freecad.importNURBS.core import converters
+#     converters.register("Hatch", convert_hatch)
+
+
+class ConverterRegistry:
+    def __init__(self):
+        self._handlers = {}
+        self._cache = {}
+
+    def register(self, geo_type, handler=None):
+        "Register handler for geo_type, usable as a decorator"
+        key = geo_type if isinstance(geo_type, str) else geo_type.__name__
+
+        def add(handler):
+            self._handlers[key] = handler
+            self._cache.clear()
+            return handler
+
+        if handler is None:
+            return add
+        return add(handler)
+
+    def unregister(self, geo_type):
+        key = geo_type if isinstance(geo_type, str) else geo_type.__name__
+        self._handlers.pop(key, None)
+        self._cache.clear()
+
+    def resolve(self, geo_type):
+        "Return the handler for a concrete geometry type or None"
+        try:
+            return self._cache[geo_type]
+        except KeyError:
+            pass
+        handler = None
+        for klass in geo_type.__mro__:
+            handler = self._handlers.get(klass.__name__)
+            if handler is not None:
+                break
+        self._cache[geo_type] = handler
+        return handler
+
+    def copy(self):
+        registry = ConverterRegistry()
+        registry._handlers.update(self._handlers)
+        return registry
+
+    def __contains__(self, geo_type):
+        key = geo_type if isinstance(geo_type, str) else geo_type.__name__
+        return key in self._handlers
@@ -0,0 +1,129 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Dialog choosing which objects of a 3dm file to import, by layer,
+# geometry type and bounding box, from a FileIndex
+
+from PySide import QtCore, QtGui
+
+
+class SelectionDialog(QtGui.QDialog):
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.setWindowTitle("Import 3DM - select objects")
+        layout = QtGui.QVBoxLayout(self)
+
+        layerCounts, typeCounts = index.counts()
+        lists = QtGui.QHBoxLayout()
+        self.layers = self.checkList(lists, "Layers", layerCounts)
+        self.types = self.checkList(lists, "Object types", typeCounts)
+        layout.addLayout(lists)
+
+        self.box = QtGui.QGroupBox("Bounding box")
+        self.box.setCheckable(True)
+        self.box.setChecked(False)
+        grid = QtGui.QGridLayout(self.box)
+        extent = index.extent() or (0.0,) * 6
+        self.limits = []
+        for row, label in enumerate(("Min", "Max")):
+            grid.addWidget(QtGui.QLabel(label), row, 0)
+            for col, axis in enumerate("XYZ"):
+                spin = QtGui.QDoubleSpinBox()
+                spin.setRange(-1e12, 1e12)
+                spin.setDecimals(3)
+                spin.setPrefix(axis + " ")
+                spin.setValue(extent[3 * row + col])
+                spin.valueChanged.connect(self.updateCount)
+                grid.addWidget(spin, row, col + 1)
+                self.limits.append(spin)
+        self.inside = QtGui.QCheckBox("Only objects wholly inside")
+        self.inside.toggled.connect(self.updateCount)
+        grid.addWidget(self.inside, 2, 0, 1, 4)
+        self.box.toggled.connect(self.updateCount)
+        layout.addWidget(self.box)
+
+        self.count = QtGui.QLabel()
+        layout.addWidget(self.count)
+        buttons = QtGui.QDialogButtonBox(
+            QtGui.QDialogButtonBox.Ok | QtGui.QDialogButtonBox.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.updateCount()
+
+    def checkList(self, layout, title, counts):
+        group = QtGui.QGroupBox(title)
+        box = QtGui.QVBoxLayout(group)
+        widget = QtGui.QListWidget()
+        for name in sorted(counts):
+            item = QtGui.QListWidgetItem(f"{name} ( {counts[name]} )")
+            item.setData(QtCore.Qt.UserRole, name)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked)
+            widget.addItem(item)
+        widget.itemChanged.connect(self.updateCount)
+        box.addWidget(widget)
+        layout.addWidget(group)
+        return widget
+
+    def checked(self, widget):
+        # None when everything is checked, no filter needed
+        names = []
+        for i in range(widget.count()):
+            item = widget.item(i)
+            if item.checkState() == QtCore.Qt.Checked:
+                names.append(item.data(QtCore.Qt.UserRole))
+        return None if len(names) == widget.count() else names
+
+    def filters(self):
+        "FileIndex.select keyword arguments for the current choices"
+        box = None
+        if self.box.isChecked():
+            box = [spin.value() for spin in self.limits]
+        return dict(
+            layers=self.checked(self.layers),
+            types=self.checked(self.types),
+            box=box,
+            inside=self.inside.isChecked(),
+        )
+
+    def selection(self):
+        return self.index.select(**self.filters())
+
+    def updateCount(self, *args):
+        total = len(self.index) - int(self.index.definition.sum())
+        self.count.setText(f"{len(self.selection())} of {total} objects selected")
+
+
+def ask_selection(index):
+    "Indices of the objects chosen in the dialog, None when cancelled"
+    import FreeCADGui
+
+    dialog = SelectionDialog(index, FreeCADGui.getMainWindow())
+    if dialog.exec_() != QtGui.QDialog.Accepted:
+        return None
+    return dialog.selection()
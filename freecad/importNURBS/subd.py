@@ -0,0 +1,315 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# SubD conversion
+#
+# A SubD's control net is read once into NumPy arrays and refined by
+# Catmull-Clark subdivision, each level computed for all faces at once
+# with array operations ( no per face Python ). Faces are polygons stored
+# as a flat vertex index array with face start offsets. Every level turns
+# each face corner into a quad, so memory grows by 4 per level. Crease
+# edges ( and boundaries ) use the crease rules, corner vertices stay put.
+#
+# The refined net is taken to the limit surface and imported as a mesh,
+# or as one B-spline patch per quad of the first level ( subd_patches ).
+# Nothing here imports FreeCAD.
+
+import numpy as np
+
+from .ir import MeshIR, SurfaceIR
+from .lazy import LazyModule
+
+r3 = LazyModule("rhino3dm")
+
+
+class ControlNet:
+    # points (n, 3), indices the face vertices one face after the other,
+    # offsets (faces + 1) where each face starts, creases (k, 2) vertex
+    # pairs, corners vertex indices. grids, once tracked, hold the point
+    # indices of each first level quad as an (m + 1) x (m + 1) grid.
+    __slots__ = ("points", "indices", "offsets", "creases", "corners", "grids", "cells")
+
+    def __init__(self, points, indices, offsets, creases=None, corners=None):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.creases = np.empty((0, 2), dtype=np.int64) if creases is None else (
+            np.asarray(creases, dtype=np.int64).reshape(-1, 2)
+        )
+        self.corners = np.empty(0, dtype=np.int64) if corners is None else (
+            np.asarray(corners, dtype=np.int64)
+        )
+        self.grids = None
+        self.cells = None
+
+    @property
+    def face_count(self):
+        return len(self.offsets) - 1
+
+
+def _items(iterator):
+    # rhino3dm SubD iterators : First, then Next, Count of them
+    for i in range(iterator.Count):
+        yield iterator.First() if i == 0 else iterator.Next()
+
+
+def control_net(subd):
+    "ControlNet of a rhino3dm SubD, with its crease edges and corner vertices"
+    vertices = subd.Vertices
+    ids = {}
+    points = np.empty((vertices.Count, 3))
+    corners = []
+    for i, v in enumerate(_items(vertices)):
+        ids[v.Id] = i
+        p = v.ControlNetPoint
+        points[i] = (p.X, p.Y, p.Z)
+        if v.Tag == r3.SubDVertexTag.Corner:
+            corners.append(i)
+    indices = []
+    offsets = [0]
+    for f in _items(subd.Faces):
+        indices += [ids[f.Vertex(k).Id] for k in range(f.VertexCount)]
+        offsets.append(len(indices))
+    creases = [
+        (ids[e.VertexId(0)], ids[e.VertexId(1)])
+        for e in _items(subd.Edges)
+        if e.Tag == r3.SubDEdgeTag.Crease
+    ]
+    return ControlNet(points, indices, offsets, creases, corners)
+
+
+def _sum_rows(index, values, count):
+    "Sum rows of values (k, 3) into count rows by index"
+    return np.stack(
+        [np.bincount(index, weights=values[:, c], minlength=count) for c in range(3)],
+        axis=1,
+    )
+
+
+class _Topology:
+    # Corner and edge tables of a ControlNet, shared by subdivision and
+    # limit evaluation
+    def __init__(self, net):
+        idx = net.indices
+        off = net.offsets
+        V = len(net.points)
+        counts = np.diff(off)
+        corners = np.arange(len(idx))
+        self.face = np.repeat(np.arange(len(counts)), counts)
+        # next and previous corner of the same face
+        self.next = corners + 1
+        self.next[off[1:] - 1] = off[:-1]
+        self.prev = corners - 1
+        self.prev[off[:-1]] = off[1:] - 1
+        a = idx
+        b = idx[self.next]
+        self.keys, self.edge = np.unique(
+            np.minimum(a, b) * V + np.maximum(a, b), return_inverse=True
+        )
+        self.edge = self.edge.reshape(-1)
+        self.e0 = self.keys // V
+        self.e1 = self.keys % V
+        E = len(self.keys)
+        self.edge_faces = np.bincount(self.edge, minlength=E)
+        # explicit creases, boundary and non manifold edges are sharp too
+        self.crease = np.zeros(E, dtype=bool)
+        if len(net.creases):
+            c = net.creases
+            ckeys = np.minimum(c[:, 0], c[:, 1]) * V + np.maximum(c[:, 0], c[:, 1])
+            self.crease = np.isin(self.keys, ckeys)
+        self.sharp = self.crease | (self.edge_faces != 2)
+        ends = np.concatenate((self.e0, self.e1))
+        self.valence = np.bincount(ends, minlength=V)
+        sharpEnds = np.concatenate((self.e0[self.sharp], self.e1[self.sharp]))
+        self.sharp_valence = np.bincount(sharpEnds, minlength=V)
+        # vertices that never move : corners, and where more than 2 sharp
+        # edges meet
+        self.fixed = self.sharp_valence > 2
+        self.fixed[net.corners] = True
+        self.V = V
+
+    def edge_id(self, a, b):
+        V = self.V
+        return np.searchsorted(self.keys, np.minimum(a, b) * V + np.maximum(a, b))
+
+    def sharp_neighbours(self, P):
+        "Sum of the other end of each vertex's sharp edges"
+        s = self.sharp
+        return _sum_rows(
+            np.concatenate((self.e0[s], self.e1[s])),
+            np.concatenate((P[self.e1[s]], P[self.e0[s]])),
+            self.V,
+        )
+
+
+def subdivide(net):
+    "One Catmull-Clark level, every face corner becomes a quad"
+    P = net.points
+    idx = net.indices
+    off = net.offsets
+    t = _Topology(net)
+    V = t.V
+    E = len(t.keys)
+    F = net.face_count
+    counts = np.diff(off)
+
+    FP = np.add.reduceat(P[idx], off[:-1], axis=0) / counts[:, None]
+    mid = (P[t.e0] + P[t.e1]) * 0.5
+    EP = mid.copy()
+    smooth = ~t.sharp
+    faceSum = _sum_rows(t.edge, FP[t.face], E)
+    EP[smooth] = (P[t.e0[smooth]] + P[t.e1[smooth]] + faceSum[smooth]) * 0.25
+
+    n = np.maximum(t.valence, 1)[:, None].astype(np.float64)
+    nf = np.maximum(np.bincount(idx, minlength=V), 1)[:, None]
+    Favg = _sum_rows(idx, FP[t.face], V) / nf
+    Ravg = _sum_rows(np.concatenate((t.e0, t.e1)), np.concatenate((mid, mid)), V) / n
+    VP = (Favg + 2.0 * Ravg + (n - 3.0) * P) / n
+    crease = t.sharp_valence == 2
+    VP[crease] = (6.0 * P[crease] + t.sharp_neighbours(P)[crease]) / 8.0
+    keep = t.fixed | (t.valence == 0)
+    VP[keep] = P[keep]
+
+    quads = np.stack(
+        (idx, V + t.edge, V + E + t.face, V + t.edge[t.prev]), axis=1
+    ).reshape(-1)
+    ce = np.flatnonzero(t.crease)
+    creases = np.concatenate(
+        (np.stack((t.e0[ce], V + ce), axis=1), np.stack((V + ce, t.e1[ce]), axis=1))
+    )
+    result = ControlNet(
+        np.concatenate((VP, EP, FP)),
+        quads,
+        np.arange(0, len(quads) + 1, 4),
+        creases,
+        net.corners,
+    )
+    if net.grids is not None:
+        _refine_grids(net, t, result)
+    return result
+
+
+def _refine_grids(net, t, result):
+    # Each grid doubles : old points keep their index, edge and face points
+    # are looked up from the edge table and the grid cells
+    G = net.grids
+    cells = net.cells
+    V = t.V
+    E = len(t.keys)
+    q, m = G.shape[0], G.shape[1] - 1
+    grid = np.empty((q, 2 * m + 1, 2 * m + 1), dtype=np.int64)
+    grid[:, ::2, ::2] = G
+    grid[:, ::2, 1::2] = V + t.edge_id(G[:, :, :-1], G[:, :, 1:])
+    grid[:, 1::2, ::2] = V + t.edge_id(G[:, :-1, :], G[:, 1:, :])
+    grid[:, 1::2, 1::2] = V + E + cells
+    # the child quad at a cell corner is the one made from that face corner
+    quads = net.indices.reshape(-1, 4)
+    child = np.empty((q, 2 * m, 2 * m), dtype=np.int64)
+    for di in (0, 1):
+        for dj in (0, 1):
+            v = G[:, di : di + m, dj : dj + m]
+            k = (quads[cells] == v[..., None]).argmax(axis=-1)
+            child[:, di::2, dj::2] = net.offsets[cells] + k
+    result.grids = grid
+    result.cells = child
+
+
+def track_grids(net):
+    "Start tracking grids on a quad net, one 2 x 2 grid per quad"
+    quads = net.indices.reshape(-1, 4)
+    net.grids = quads[:, [0, 1, 3, 2]].reshape(-1, 2, 2)
+    net.cells = np.arange(len(quads)).reshape(-1, 1, 1)
+    return net
+
+
+def limit_points(net):
+    "Points of a quad net moved onto the Catmull-Clark limit surface"
+    P = net.points
+    idx = net.indices
+    t = _Topology(net)
+    V = t.V
+    n = np.maximum(t.valence, 1)[:, None].astype(np.float64)
+    edgeSum = _sum_rows(
+        np.concatenate((t.e0, t.e1)), np.concatenate((P[t.e1], P[t.e0])), V
+    )
+    diagonalSum = _sum_rows(idx, P[idx[t.next[t.next]]], V)
+    L = (n * n * P + 4.0 * edgeSum + diagonalSum) / (n * (n + 5.0))
+    crease = t.sharp_valence == 2
+    L[crease] = (4.0 * P[crease] + t.sharp_neighbours(P)[crease]) / 6.0
+    keep = t.fixed | (t.valence == 0)
+    L[keep] = P[keep]
+    return L
+
+
+def triangles(net):
+    "Fan triangulation of every face, (k, 3) point indices"
+    off = net.offsets
+    counts = np.diff(off)
+    fans = np.maximum(counts - 2, 0)
+    first = np.repeat(off[:-1], fans)
+    # position of each triangle within its face's fan
+    k = np.arange(fans.sum()) - np.repeat(np.cumsum(fans) - fans, fans)
+    idx = net.indices
+    return np.stack((idx[first], idx[first + k + 1], idx[first + k + 2]), axis=1)
+
+
+def refine(net, level, grids=False):
+    "net subdivided level times, grids tracked from the first level"
+    for i in range(level):
+        net = subdivide(net)
+        if grids and i == 0:
+            track_grids(net)
+    return net
+
+
+def subd_mesh(net, level):
+    "MeshIR of the limit surface tessellated by level subdivisions"
+    if level < 1:
+        return MeshIR(net.points, triangles(net))
+    net = refine(net, level)
+    return MeshIR(limit_points(net), triangles(net))
+
+
+def uniform_knots(poles, degree):
+    "Clamped uniform knots and multiplicities for this many poles"
+    spans = poles - degree
+    knots = np.linspace(0.0, 1.0, spans + 1)
+    mults = [1] * (spans + 1)
+    mults[0] = mults[-1] = degree + 1
+    return knots.tolist(), mults
+
+
+def subd_patches(net, level):
+    """SurfaceIR per first level quad, poles on the limit surface. Patches
+    next to each other share their boundary poles, so they meet exactly"""
+    level = max(1, level)
+    net = refine(net, level, grids=True)
+    poles = limit_points(net)[net.grids]
+    m = poles.shape[1] - 1
+    degree = min(3, m)
+    knots, mults = uniform_knots(m + 1, degree)
+    return [
+        SurfaceIR(degree, degree, knots, mults, knots, mults, p, None) for p in poles
+    ]
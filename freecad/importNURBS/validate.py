@@ -0,0 +1,223 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+# Shape validation and healing after an import
+#
+# Every shape the import created is checked : OpenCASCADE validity, largest
+# sub shape tolerance against the model tolerance, degenerate and tiny
+# edges and the knot vectors of B-spline edges and faces. Fixes chosen
+# with ValidateFixes are applied to plain Part::Feature shapes, the
+# results go into a per object report. With several workers shapes travel
+# to the pool as BRep strings and come back only when a fix changed them.
+
+import json
+
+from .geometry import knot_problem
+from .lazy import LazyModule
+from .parallel import worker_count
+
+Part = LazyModule("Part")
+
+# Fixes in the order they are applied
+FIXES = ("tolerance", "tinyedges", "sew", "shape")
+
+
+def bspline_problems(shape):
+    "Knot vector problems of the B-spline edges and faces of shape"
+    problems = []
+    for i, edge in enumerate(shape.Edges):
+        c = edge.Curve
+        if isinstance(c, Part.BSplineCurve):
+            why = knot_problem(
+                c.getKnots(), c.getMultiplicities(), c.Degree, c.NbPoles, c.isPeriodic()
+            )
+            if why:
+                problems.append(f"Edge{i + 1} {why}")
+    for i, face in enumerate(shape.Faces):
+        s = face.Surface
+        if isinstance(s, Part.BSplineSurface):
+            why = knot_problem(
+                s.getUKnots(), s.getUMultiplicities(), s.UDegree, s.NbUPoles,
+                s.isUPeriodic(),
+            ) or knot_problem(
+                s.getVKnots(), s.getVMultiplicities(), s.VDegree, s.NbVPoles,
+                s.isVPeriodic(),
+            )
+            if why:
+                problems.append(f"Face{i + 1} {why}")
+    return problems
+
+
+def check_shape(shape, tolerance):
+    "Measurements and problems of one shape, a dict for the report"
+    if shape.isNull():
+        return {"valid": False, "issues": ["null shape"]}
+    edges = shape.Edges
+    degenerate = sum(1 for e in edges if e.Degenerated)
+    tiny = sum(1 for e in edges if not e.Degenerated and e.Length < tolerance)
+    largest = shape.getTolerance(1)
+    issues = []
+    valid = shape.isValid()
+    if not valid:
+        issues.append("invalid")
+    if largest > tolerance:
+        issues.append(f"tolerance {largest:.3g}")
+    if tiny:
+        issues.append(f"{tiny} tiny edges")
+    issues += bspline_problems(shape)
+    return {
+        "valid": valid,
+        "tolerance": largest,
+        "edges": len(edges),
+        "degenerate_edges": degenerate,
+        "tiny_edges": tiny,
+        "issues": issues,
+    }
+
+
+def fix_shape(shape, fixes, tolerance):
+    "Copy of shape with fixes applied, and the names of those that ran"
+    shape = shape.copy()
+    done = []
+    if "tolerance" in fixes and shape.getTolerance(1) > tolerance:
+        shape.limitTolerance(0.0, tolerance)
+        done.append("tolerance")
+    if "tinyedges" in fixes and any(
+        not e.Degenerated and e.Length < tolerance for e in shape.Edges
+    ):
+        wireframe = Part.ShapeFix.Wireframe(shape)
+        wireframe.ModeDropSmallEdges = True
+        wireframe.setPrecision(tolerance)
+        wireframe.fixSmallEdges()
+        wireframe.fixWireGaps()
+        shape = wireframe.shape()
+        done.append("tinyedges")
+    if "sew" in fixes and len(shape.Faces) > 1 and len(shape.Shells) != 1:
+        shape.sewShape(tolerance)
+        done.append("sew")
+    if "shape" in fixes and not shape.isValid():
+        shape.fix(tolerance, tolerance, tolerance * 10)
+        done.append("shape")
+    return shape, done
+
+
+def validate_shape(shape, tolerance, fixes=()):
+    "( report entry, fixed shape or None )"
+    entry = check_shape(shape, tolerance)
+    if not fixes or not entry["issues"] or shape.isNull():
+        return entry, None
+    try:
+        fixed, done = fix_shape(shape, fixes, tolerance)
+    except Exception as e:
+        entry["fix_error"] = str(e)
+        return entry, None
+    if not done:
+        return entry, None
+    after = check_shape(fixed, tolerance)
+    entry["fixes"] = done
+    entry["valid_after"] = after["valid"]
+    entry["issues_after"] = after["issues"]
+    return entry, fixed
+
+
+def _init_worker():
+    # Part needs the FreeCAD application loaded first
+    import FreeCAD  # noqa: F401
+
+
+def _validate_breps(items, tolerance, fixes):
+    results = []
+    for i, brep, fixable in items:
+        shape = Part.Shape()
+        shape.importBrepFromString(brep)
+        entry, fixed = validate_shape(shape, tolerance, fixes if fixable else ())
+        results.append((i, entry, fixed.exportBrepToString() if fixed else None))
+    return results
+
+
+def validate_objects(objs, tolerance, fixes=(), workers=1, recompute=True):
+    """Report entries for the shapes of objs, fixed shapes are put back into
+    Part::Feature objects. Parametric objects are reported, not changed"""
+    targets = [o for o in objs if hasattr(o, "Shape") and o.TypeId.startswith("Part::")]
+    entries = []
+    fixed = {}
+    if worker_count(workers) > 1 and len(targets) > 1:
+        from .parallel import process_pool
+
+        items = [
+            (i, o.Shape.exportBrepToString(), o.TypeId == "Part::Feature")
+            for i, o in enumerate(targets)
+        ]
+        chunk = max(1, min(200, len(items) // (worker_count(workers) * 4) or 1))
+        results = {}
+        with process_pool(workers, _init_worker) as pool:
+            futures = [
+                pool.submit(_validate_breps, items[s : s + chunk], tolerance, fixes)
+                for s in range(0, len(items), chunk)
+            ]
+            for future in futures:
+                for i, entry, brep in future.result():
+                    results[i] = entry
+                    if brep is not None:
+                        shape = Part.Shape()
+                        shape.importBrepFromString(brep)
+                        fixed[i] = shape
+        entries = [results[i] for i in range(len(targets))]
+    else:
+        for i, o in enumerate(targets):
+            entry, shape = validate_shape(
+                o.Shape, tolerance, fixes if o.TypeId == "Part::Feature" else ()
+            )
+            entries.append(entry)
+            if shape is not None:
+                fixed[i] = shape
+    for i, (obj, entry) in enumerate(zip(targets, entries)):
+        entry["object"] = obj.Name
+        entry["label"] = obj.Label
+        entry["type"] = obj.TypeId
+        if "RhinoId" in obj.PropertiesList:
+            entry["rhino_id"] = obj.RhinoId
+        if i in fixed:
+            obj.Shape = fixed[i]
+            if recompute:
+                obj.recompute()
+    return entries
+
+
+def summary(entries):
+    checked = len(entries)
+    bad = sum(1 for e in entries if e["issues"])
+    invalid = sum(1 for e in entries if not e["valid"])
+    fixed = sum(1 for e in entries if e.get("fixes"))
+    still = sum(1 for e in entries if e.get("fixes") and not e["valid_after"])
+    return (
+        f"Validation : {checked} shapes checked, {bad} with issues, {invalid} invalid,"
+        f" {fixed} fixed ( {still} still invalid )"
+    )
+
+
+def write_report(entries, path):
+    with open(path, "w") as fp:
+        json.dump(entries, fp, indent=2)
@@ -0,0 +1,86 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+import os
+
+import Part
+
+from freecad.importNURBS.cache import ShapeCache
+
+
+def stored(cache, key):
+    return os.path.exists(cache.path(key))
+
+
+def test_round_trip(tmp_path):
+    cache = ShapeCache(str(tmp_path))
+    key = cache.key("file", "id", 1e-10)
+    assert cache.get(key) is None
+    cache.put(key, Part.Compound([]))
+    assert cache.contains(key)
+    assert cache.get(key) is not None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_key_depends_on_every_part(tmp_path):
+    cache = ShapeCache(str(tmp_path))
+    assert cache.key("file", "id", 2) != cache.key("file", "id", 3)
+    assert ShapeCache(str(tmp_path), version="1").key("a") != cache.key("a")
+
+
+def test_trim_evicts_least_recently_used(tmp_path):
+    cache = ShapeCache(str(tmp_path))
+    keys = [cache.key(i) for i in range(3)]
+    for t, key in enumerate(keys):
+        cache.put(key, Part.Compound([]))
+        os.utime(cache.path(key), (1000 + t, 1000 + t))
+    size = os.path.getsize(cache.path(keys[0]))
+    # reading the oldest makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    cache.max_bytes = 2 * size
+    cache.trim()
+    assert cache.evictions == 1
+    assert not stored(cache, keys[1])
+    assert stored(cache, keys[0]) and stored(cache, keys[2])
+    assert cache.size() == 2 * size
+
+
+def test_trim_within_limit_keeps_everything(tmp_path):
+    cache = ShapeCache(str(tmp_path))
+    cache.put(cache.key("a"), Part.Compound([]))
+    cache.trim()
+    assert cache.evictions == 0
+    assert cache.contains(cache.key("a"))
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = ShapeCache(str(tmp_path))
+    key = cache.key("a")
+    os.makedirs(os.path.dirname(cache.path(key)))
+    with open(cache.path(key), "wb") as fp:
+        fp.write(b"\xff")
+    assert cache.get(key) is None
+    assert not cache.contains(key)
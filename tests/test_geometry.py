@@ -0,0 +1,145 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from freecad.importNURBS.geometry import (
+    VoxelFilter,
+    compress_knots,
+    fc_knots,
+    mesh_arrays,
+    point_cloud_chunks,
+    triangulate,
+)
+
+
+def dense_knots(n, degree=3, seed=1):
+    # clamped vector, n interior knots some of them repeated
+    rng = random.Random(seed)
+    knots = [0.0] * degree
+    value = 0.0
+    while len(knots) < n + degree:
+        value += 1.0
+        knots.extend([value] * rng.choice((1, 1, 1, 2, 3)))
+    knots.extend([value + 1.0] * degree)
+    return knots
+
+
+@pytest.mark.parametrize("n", [10, 1000, 20000])
+def test_compress_knots_dense(n):
+    knots = dense_knots(n)
+    counts = Counter(knots)
+    unique = sorted(counts)
+    assert compress_knots(knots) == (unique, [counts[k] for k in unique])
+
+
+def test_compress_knots_merges_near_duplicates():
+    # set() would keep 0.5 and 0.5 + 1e-15 apart
+    knots = [0.0, 0.0, 0.0, 0.5, 0.5 + 1e-15, 1.0, 1.0, 1.0]
+    assert compress_knots(knots) == ([0.0, 0.5, 1.0], [3, 2, 3])
+
+
+def test_compress_knots_tolerance_from_run_start():
+    # each knot is within tolerance of the one before, not of the first
+    assert compress_knots([0.0, 0.4, 0.8, 1.2], 0.5) == ([0.0, 0.8], [2, 2])
+    knots, mults = compress_knots([0.0, 0.6e-10, 1.2e-10, 1.0], tolerance=1e-10)
+    assert knots == [0.0, 1.2e-10, 1.0]
+    assert mults == [2, 1, 1]
+
+
+def test_compress_knots_empty():
+    assert compress_knots([]) == ([], [])
+
+
+def test_fc_knots_adds_end_knots():
+    # degree 3 clamped curve with 5 poles : 3dm stores 7 knots, FreeCAD 9
+    knots, mults = fc_knots([0.0, 0.0, 0.0, 0.5, 1.0, 1.0, 1.0])
+    assert knots == [0.0, 0.5, 1.0]
+    assert mults == [4, 1, 4]
+    assert sum(mults) == 5 + 3 + 1
+
+
+def test_mesh_arrays():
+    r3 = pytest.importorskip("rhino3dm")
+    mesh = r3.Mesh()
+    for p in ((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (2, 0, 0)):
+        mesh.Vertices.Add(*p)
+    mesh.Faces.AddFace(0, 1, 2, 3)
+    mesh.Faces.AddFace(1, 4, 2)
+    points, faces = mesh_arrays(mesh)
+    assert points.shape == (5, 3)
+    assert points[4].tolist() == [2.0, 0.0, 0.0]
+    # triangles repeat their third vertex
+    assert faces.tolist() == [[0, 1, 2, 3], [1, 4, 2, 2]]
+    assert triangulate(faces).tolist() == [[0, 1, 2], [1, 4, 2], [0, 2, 3]]
+
+
+def test_point_cloud_chunks_with_colors_and_normals():
+    r3 = pytest.importorskip("rhino3dm")
+    pc = r3.PointCloud()
+    for i in range(10):
+        pc.Add(r3.Point3d(i, 0, 0), r3.Vector3d(0, 0, 1), (i, 2 * i, 3 * i, 255))
+    chunks = list(point_cloud_chunks(pc, chunk=4, stride=2))
+    # every second point, read four at a time
+    assert [len(points) for points, _, _ in chunks] == [4, 1]
+    points, colors, normals = (np.concatenate(a) for a in zip(*chunks))
+    assert points[:, 0].tolist() == [0, 2, 4, 6, 8]
+    assert colors[1].tolist() == [2, 4, 6]
+    assert normals.tolist() == [[0, 0, 1]] * 5
+
+
+def test_point_cloud_chunks_points_only():
+    r3 = pytest.importorskip("rhino3dm")
+    pc = r3.PointCloud()
+    for i in range(5):
+        pc.Add(r3.Point3d(i, i, i))
+    ((points, colors, normals),) = point_cloud_chunks(pc)
+    assert points.shape == (5, 3)
+    assert colors is None and normals is None
+
+
+def test_voxel_filter_keeps_first_point_per_cell():
+    keep = VoxelFilter((0.0, 0.0, 0.0), 1.0)
+    points = np.array([[0.1, 0.1, 0.1], [0.9, 0.9, 0.9], [1.5, 0.1, 0.1], [0.2, 0.2, 0.2]])
+    assert keep(points).tolist() == [0, 2]
+
+
+def test_voxel_filter_across_chunks():
+    keep = VoxelFilter((0.0, 0.0, 0.0), 1.0)
+    keep(np.array([[0.5, 0.5, 0.5]]))
+    # the first cell was seen in the chunk before
+    points = np.array([[0.4, 0.4, 0.4], [3.5, 0.5, 0.5], [3.6, 0.6, 0.6]])
+    assert keep(points).tolist() == [1]
+    assert keep(points).tolist() == []
+
+
+def test_voxel_filter_clips_points_below_origin():
+    keep = VoxelFilter((0.0, 0.0, 0.0), 1.0)
+    points = np.array([[-5.0, 0.5, 0.5], [0.5, 0.5, 0.5]])
+    assert keep(points).tolist() == [0]
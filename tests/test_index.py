@@ -0,0 +1,80 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+import pytest
+
+from freecad.importNURBS.index import FileIndex
+
+r3 = pytest.importorskip("rhino3dm")
+
+
+@pytest.fixture
+def index():
+    # lines 0 and 1 on Walls, a sphere on Doors, line 3 on Doors
+    model = r3.File3dm()
+    for name in ("Walls", "Doors"):
+        layer = r3.Layer()
+        layer.Name = name
+        model.Layers.Add(layer)
+    for layer, start, end in ((0, (0, 0, 0), (1, 0, 0)), (0, (5, 5, 0), (6, 5, 0))):
+        attributes = r3.ObjectAttributes()
+        attributes.LayerIndex = layer
+        model.Objects.AddLine(r3.Point3d(*start), r3.Point3d(*end), attributes)
+    attributes = r3.ObjectAttributes()
+    attributes.LayerIndex = 1
+    model.Objects.AddSphere(r3.Sphere(r3.Point3d(0, 0, 0), 1), attributes)
+    attributes = r3.ObjectAttributes()
+    attributes.LayerIndex = 1
+    model.Objects.AddLine(r3.Point3d(10, 0, 0), r3.Point3d(11, 0, 0), attributes)
+    return FileIndex(model)
+
+
+def test_select_everything(index):
+    assert index.select() == [0, 1, 2, 3]
+
+
+def test_select_layers_by_name_or_index(index):
+    assert index.select(layers=["Walls"]) == [0, 1]
+    assert index.select(layers=[1]) == [2, 3]
+    assert index.select(layers=["Missing"]) == []
+
+
+def test_select_types(index):
+    sphere = index.types[2]
+    assert index.select(types=[sphere]) == [2]
+    assert index.select(layers=["Doors"], types=[index.types[3]]) == [3]
+
+
+def test_select_box_intersecting_or_inside(index):
+    box = (-0.5, -0.5, -0.5, 2, 2, 2)
+    assert index.select(box=box) == [0, 2]
+    # the sphere reaches past the box
+    assert index.select(box=box, inside=True) == [0]
+
+
+def test_counts(index):
+    layers, types = index.counts()
+    assert layers == {"Walls": 2, "Doors": 2}
+    assert sum(types.values()) == 4
@@ -0,0 +1,73 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+import os
+
+import numpy as np
+import pytest
+
+from freecad.importNURBS import ir
+from freecad.importNURBS.ir import BrepIR, ExtrusionIR, WireIR, dump, extract_file, load
+
+r3 = pytest.importorskip("rhino3dm")
+
+CASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "testCases")
+
+
+def same(a, b):
+    "Records equal field by field, arrays included"
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, np.ndarray):
+        return a.dtype == b.dtype and np.array_equal(a, b)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    slots = [s for cls in type(a).__mro__ for s in getattr(cls, "__slots__", ())]
+    if slots:
+        return all(same(getattr(a, s), getattr(b, s)) for s in slots)
+    return a == b
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["Curve", "Ellipse", "PolyCurve_Joined_Line_NURBS-curve", "Surface", "PolysurfCylinder"],
+)
+def test_dump_load_round_trip(tmp_path, name):
+    records = extract_file(os.path.join(CASES, name + ".3dm"), analytic=1e-3, fingerprints=True)
+    assert records and all(r.geometry is not None for r in records)
+    path = str(tmp_path / "records.pickle")
+    dump(records, path)
+    loaded = load(path)
+    assert same(records, loaded)
+    assert loaded[0].fingerprint is not None
+
+
+def test_extrusion_without_profile_edges_is_a_brep(monkeypatch):
+    circle = r3.Circle(r3.Point3d(0, 0, 0), 1).ToNurbsCurve()
+    extrusion = r3.Extrusion.Create(circle, 5, True)
+    assert isinstance(ir.extrusion_ir(extrusion), ExtrusionIR)
+    # as when segments_ir drops every segment of a zero length profile
+    monkeypatch.setattr(ir, "wire_ir", lambda *args: WireIR([]))
+    assert isinstance(ir.extrusion_ir(extrusion), BrepIR)
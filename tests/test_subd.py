@@ -0,0 +1,84 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+import numpy as np
+
+from freecad.importNURBS.subd import ControlNet, subd_mesh, subdivide
+
+CUBE = [(x, y, z) for z in (-1, 1) for y in (-1, 1) for x in (-1, 1)]
+CUBE_FACES = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+
+
+def make_net(points, faces, creases=None, corners=None):
+    offsets = np.cumsum([0] + [len(f) for f in faces])
+    return ControlNet(points, [v for f in faces for v in f], offsets, creases, corners)
+
+
+def has_point(points, p):
+    return bool(np.any(np.all(np.isclose(points, p), axis=1)))
+
+
+def test_cube_points():
+    net = subdivide(make_net(CUBE, CUBE_FACES))
+    assert len(net.points) == 8 + 12 + 6
+    assert net.face_count == 24
+    # vertex points come first, in the order of the control points
+    assert np.allclose(net.points[7], (5 / 9, 5 / 9, 5 / 9))
+    assert has_point(net.points, (0.75, 0.75, 0.0))  # edge point
+    assert has_point(net.points, (1.0, 0.0, 0.0))  # face point
+
+
+def test_creases_and_corners():
+    bottom = [(0, 1), (1, 3), (3, 2), (2, 0)]
+    net = subdivide(make_net(CUBE, CUBE_FACES, creases=bottom, corners=[7]))
+    # crease vertex from its two crease neighbours, corners stay
+    assert np.allclose(net.points[0], (-0.75, -0.75, -1.0))
+    assert np.allclose(net.points[7], CUBE[7])
+    # crease edge points are the edge midpoints, and stay creases
+    assert has_point(net.points, (0.0, -1.0, -1.0))
+    assert len(net.creases) == 2 * len(bottom)
+
+
+def test_triangle_and_pentagon_become_quads():
+    points = [(0, 0, 0), (1, 0, 0), (2, 0, 0), (0, 1, 0), (1, 1, 0.5), (2, 1, 0),
+              (0, 2, 0), (1, 2, 0), (2, 2, 0.3), (3, 1, 0), (3, 2, 0), (2.5, 2.5, 0)]
+    faces = [(0, 1, 4, 3), (1, 2, 5, 4), (3, 4, 7, 6), (4, 5, 8, 7), (2, 9, 5),
+             (5, 9, 10, 11, 8)]
+    net = subdivide(make_net(points, faces))
+    assert net.face_count == 4 * 4 + 3 + 5
+    assert np.all(np.diff(net.offsets) == 4)
+    # the face point of the triangle is its centroid
+    assert has_point(net.points, np.mean([points[2], points[9], points[5]], axis=0))
+
+
+def test_subd_mesh_levels():
+    net = make_net(CUBE, CUBE_FACES)
+    coarse = subd_mesh(net, 0)
+    assert len(coarse.facets) == 12
+    fine = subd_mesh(net, 2)
+    assert len(fine.facets) == 6 * 16 * 2
+    # the limit surface lies inside the control cube, symmetric about 0
+    assert np.all(np.abs(fine.points) < 1.0)
+    assert np.allclose(fine.points.mean(axis=0), 0.0)
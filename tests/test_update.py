@@ -0,0 +1,60 @@
+# **************************************************************************
+# *                                                                        *
+# *   Copyright (c) 2020 Keith Sloan <keith@sloan-home.co.uk>              *
+# *                                                                        *
+# *   This program is free software; you can redistribute it and/or modify *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)   *
+# *   as published by the Free Software Foundation; either version 2 of    *
+# *   the License, or (at your option) any later version.                  *
+# *   for detail see the LICENCE text file.                                *
+# *                                                                        *
+# *   This program is distributed in the hope that it will be useful,      *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of       *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        *
+# *   GNU Library General Public License for more details.                 *
+# *                                                                        *
+# *   You should have received a copy of the GNU Library General Public    *
+# *   License along with this program; if not, write to the Free Software  *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 *
+# *   USA                                                                  *
+# *                                                                        *
+# *   Acknowledgements :                                                   *
+# *                                                                        *
+# *                                                                        *
+# **************************************************************************
+
+import os
+
+import FreeCAD
+import pytest
+
+from freecad.importNURBS import core
+from freecad.importNURBS.preferences import params
+
+pytest.importorskip("rhino3dm")
+
+CASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "testCases")
+
+
+@pytest.fixture
+def incremental():
+    settings = params()
+    before = settings.GetBool("IncrementalUpdate", False)
+    settings.SetBool("IncrementalUpdate", True)
+    yield
+    settings.SetBool("IncrementalUpdate", before)
+
+
+@pytest.mark.parametrize("name", ["Surface", "Bitmap", "PolysurfCylinder", "Curve"])
+@pytest.mark.parametrize("indexed", [False, True])
+def test_update_from_same_file_changes_nothing(incremental, name, indexed):
+    path = os.path.join(CASES, name + ".3dm")
+    doc = FreeCAD.newDocument(name)
+    fi = core.File3dm(path)
+    if indexed:
+        # progressive, selective and proxy imports index the file first
+        fi.index()
+    objs = fi.parse_objects(doc)
+    part = core.findImport(doc, path)
+    counts = core.File3dm(path).update_objects(doc, part)
+    assert counts == {"added": 0, "modified": 0, "deleted": 0, "unchanged": len(objs)}